@@ -1,6 +1,8 @@
-
 import asyncio
+import json
+import os
 import sys
+import time
 from typing import Optional
 from contextlib import AsyncExitStack
 
@@ -10,15 +12,31 @@ from mcp.client.stdio import stdio_client
 from anthropic import Anthropic
 from dotenv import load_dotenv
 
+from tool_cache import ToolCache, cache_enabled
+from tracing import Tracer, payload_size
+
 load_dotenv()  # load environment variables from .env
+
+# Set by the load-test harness (loadtest.py): print per-phase timings to stderr
+PHASE_TIMINGS = bool(os.getenv("AKAIFE_PHASE_TIMINGS"))
+
+
 class MCPClient:
     def __init__(self):
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
         self.anthropic = Anthropic()
         self.messages = []  # To store the message history
+        self.tracer = Tracer()
+        self.tool_cache = ToolCache() if cache_enabled() else None
+        self.phases = {}  # Span time per kind, summed over every finished trace
+        self.llm_turns = 0
+        self.tool_calls = 0
 
     async def connect_to_server(self, server_script_path: str):
+        if server_script_path.startswith(("http://", "https://")):
+            return await self.connect_to_http_server(server_script_path)
+
         is_python = server_script_path.endswith('.py')
         is_js = server_script_path.endswith('.js')
         if not (is_python or is_js):
@@ -31,16 +49,43 @@ class MCPClient:
             env=None
         )
 
-        stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
-        self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        with self.tracer.span(server_script_path, "mcp_spawn"):
+            stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
+            self.stdio, self.write = stdio_transport
+            self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+
+        # initialize only returns once the server process is up and has imported its tools
+        with self.tracer.span(server_script_path, "mcp_init") as span:
+            await self.session.initialize()
+
+            response = await self.session.list_tools()
+            tools = response.tools
+            span.attrs["tools"] = len(tools)
 
-        await self.session.initialize()
+    async def connect_to_http_server(self, url: str):
+        """Connects to an already running server in streamable HTTP mode, e.g. http://localhost:8000/mcp."""
+        from mcp.client.streamable_http import streamablehttp_client
 
-        response = await self.session.list_tools()
-        tools = response.tools
+        with self.tracer.span(url, "mcp_spawn"):
+            read, write, _ = await self.exit_stack.enter_async_context(streamablehttp_client(url))
+            self.session = await self.exit_stack.enter_async_context(ClientSession(read, write))
+
+        with self.tracer.span(url, "mcp_init") as span:
+            await self.session.initialize()
+            response = await self.session.list_tools()
+            span.attrs["tools"] = len(response.tools)
 
     async def process_query(self, query: str) -> str:
+        self.tracer.attrs["query_chars"] = len(query)
+        try:
+            return await self._process_query(query)
+        except BaseException as e:
+            self.tracer.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.finish_trace()
+
+    async def _process_query(self, query: str) -> str:
         # Add the user's query to the message history
         self.messages.append({"role": "user", "content": query})
 
@@ -48,7 +93,9 @@ class MCPClient:
         messages = self.messages
 
         # List available tools
-        response = await self.session.list_tools()
+        with self.tracer.span("list_tools", "list_tools") as span:
+            response = await self.session.list_tools()
+            span.attrs["tools"] = len(response.tools)
         available_tools = [{
             "name": tool.name,
             "description": tool.description,
@@ -65,15 +112,22 @@ class MCPClient:
         }
 
         final_text = []
+        turn = 0
         while True:
+            turn += 1
             # Call the Anthropics API with full message history
-            response = self.anthropic.messages.create(
-                model="claude-3-7-sonnet-20250219",
-                max_tokens=20000,
-                temperature=0.7,
-                messages=[system_prompt] + messages,
-                tools=available_tools
-            )
+            with self.tracer.span(f"turn {turn}", "llm", turn=turn) as span:
+                response = self.anthropic.messages.create(
+                    model="claude-3-7-sonnet-20250219",
+                    max_tokens=20000,
+                    temperature=0.7,
+                    messages=[system_prompt] + messages,
+                    tools=available_tools
+                )
+                span.attrs["input_tokens"] = response.usage.input_tokens
+                span.attrs["output_tokens"] = response.usage.output_tokens
+                span.attrs["stop_reason"] = response.stop_reason
+            self.llm_turns += 1
 
             used_tool = False
             for content in response.content:
@@ -85,7 +139,11 @@ class MCPClient:
                     used_tool = True
                     tool_name = content.name
                     tool_args = content.input
-                    result = await self.session.call_tool(tool_name, tool_args)
+                    with self.tracer.span(tool_name, "tool", turn=turn, args_bytes=payload_size(tool_args)) as span:
+                        result = await self.call_tool(tool_name, tool_args, span)
+                        span.attrs["result_bytes"] = payload_size(result.content)
+                        span.attrs["is_error"] = bool(result.isError)
+                    self.tool_calls += 1
                     # Add the result to the conversation history
                     self.messages.append({
                         "role": "user",
@@ -98,7 +156,43 @@ class MCPClient:
 
         return "\n".join(final_text)
 
-    
+    async def call_tool(self, tool_name: str, tool_args: dict, span):
+        """Calls a tool through MCP unless this session already has a fresh result for the same arguments."""
+        if self.tool_cache is None or not self.tool_cache.cacheable(tool_name, tool_args):
+            span.attrs["cache"] = "bypass"
+            return await self.session.call_tool(tool_name, tool_args)
+        result = self.tool_cache.get(tool_name, tool_args)
+        if result is not None:
+            span.attrs["cache"] = "hit"
+            return result
+        span.attrs["cache"] = "miss"
+        result = await self.session.call_tool(tool_name, tool_args)
+        self.tool_cache.put(tool_name, tool_args, result)
+        return result
+
+    def finish_trace(self):
+        """Writes the current trace to the JSONL sink and starts a new one for the next query."""
+        self.tracer.attrs["llm_turns"] = sum(1 for s in self.tracer.spans if s.kind == "llm")
+        self.tracer.attrs["tool_calls"] = sum(1 for s in self.tracer.spans if s.kind == "tool")
+        for kind, total in self.tracer.phase_totals().items():
+            self.phases[kind] = self.phases.get(kind, 0.0) + total
+        try:
+            self.tracer.write()
+        except OSError as e:
+            print(f"Could not write trace: {e}", file=sys.stderr)
+        self.tracer = Tracer()
+
+    def report_phases(self, started_at: float):
+        """Prints one AKAIFE_PHASES JSON line to stderr for the load-test harness."""
+        spawned_at = os.getenv("AKAIFE_SPAWNED_AT")
+        report = {
+            "client_start": started_at - float(spawned_at) if spawned_at else None,
+            **self.phases,
+            "total": time.time() - started_at,
+            "llm_turns": self.llm_turns,
+            "tool_calls": self.tool_calls,
+        }
+        print("AKAIFE_PHASES " + json.dumps(report), file=sys.stderr)
 
     async def cleanup(self):
         await self.exit_stack.aclose()
@@ -107,6 +201,7 @@ async def main():
     if len(sys.argv) < 3:
         sys.exit(1)
 
+    started_at = time.time()
     query = sys.argv[2]  # Capture query from command line argument
     client = MCPClient()
     try:
@@ -115,6 +210,8 @@ async def main():
         print(response)
     finally:
         await client.cleanup()
+        if PHASE_TIMINGS:
+            client.report_phases(started_at)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,138 @@
+"""
+Local stand-in for the Anthropic Messages API, used by the load-test harness.
+
+Serves POST /v1/messages with scripted responses: each step of the script is
+either a tool call ({"tool": "Current_Time", "input": {}}) or a final answer
+({"text": "..."}). The step is picked from how many tool results the request
+already carries, so every /query walks through the same script regardless of
+how many run concurrently. Point client.py at it with ANTHROPIC_BASE_URL.
+
+Usage:
+    python fake_anthropic.py --port 8089 --latency-ms 800 --script script.json
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# Offline by default: Current_Time needs no upstream provider
+DEFAULT_SCRIPT = [
+    {"tool": "Current_Time", "input": {}},
+    {"text": "It is a good time to travel. Take the morning train from Tbilisi to Batumi."},
+]
+
+
+class FakeAnthropic:
+    """
+    Args:
+        script (List[Dict]): Steps to play back, see module docstring.
+        latency_ms (float): Mean simulated model latency per call.
+        jitter (float): Relative latency jitter, e.g. 0.2 for +/-20%.
+    """
+
+    def __init__(self, script: Optional[List[Dict[str, Any]]] = None, latency_ms: float = 0.0, jitter: float = 0.2):
+        self.script = script or DEFAULT_SCRIPT
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def respond(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.requests += 1
+        messages = body.get("messages", [])
+        # client.py sends [system prompt, query, tool result, ...] as user turns
+        step = max(0, sum(1 for m in messages if m.get("role") == "user") - 2)
+        entry = self.script[min(step, len(self.script) - 1)]
+
+        if self.latency_ms:
+            spread = self.latency_ms * self.jitter
+            time.sleep(max(0.0, random.uniform(self.latency_ms - spread, self.latency_ms + spread)) / 1000)
+
+        if "tool" in entry:
+            content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                        "name": entry["tool"], "input": entry.get("input", {})}]
+            stop_reason = "tool_use"
+        else:
+            content = [{"type": "text", "text": entry["text"]}]
+            stop_reason = "end_turn"
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": len(json.dumps(messages)) // 4,
+                "output_tokens": len(json.dumps(content)) // 4,
+            },
+        }
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts serving in a daemon thread and returns the base URL."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/v1/messages"):
+                    self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+                    return
+                self._send(200, fake.respond(body))
+
+            def _send(self, status: int, payload: Dict[str, Any]):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("request-id", f"req_{uuid.uuid4().hex[:24]}")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def load_script(path: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scripted stand-in for the Anthropic Messages API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--script", help="JSON file with the list of steps to play back.")
+    args = parser.parse_args()
+
+    fake = FakeAnthropic(load_script(args.script), args.latency_ms)
+    url = fake.serve(args.host, args.port)
+    print(f"Fake Anthropic API listening on {url} (set ANTHROPIC_BASE_URL={url})", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.shutdown()
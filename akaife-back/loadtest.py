@@ -0,0 +1,255 @@
+"""
+Load generator for the /query pipeline (server.js -> client.py -> main.py).
+
+Drives the pipeline at a fixed concurrency (closed loop) or a Poisson arrival
+rate (open loop) against the local fake Anthropic API, then reports
+throughput, end-to-end latency percentiles, a per-phase breakdown and the
+CPU/memory used by the spawned processes.
+
+Targets:
+    spawn   Run client.py per request exactly like server.js does (default).
+            Per-phase timings come from client.py (AKAIFE_PHASE_TIMINGS).
+    http    POST to a running server.js. Only end-to-end latency is measured.
+            Needs --llm-url: start fake_anthropic.py yourself and start
+            server.js with ANTHROPIC_BASE_URL pointing at it.
+
+Usage:
+    python loadtest.py --concurrency 8 --requests 80 --llm-latency-ms 800
+    python loadtest.py --rate 2 --duration 60
+    python fake_anthropic.py --port 8089 --latency-ms 800 &
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8089 node server.js &
+    python loadtest.py --target http --llm-url http://127.0.0.1:8089 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_anthropic import FakeAnthropic, load_script
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PHASES = ("client_start", "mcp_spawn", "mcp_init", "list_tools", "llm", "tool")
+
+
+class Result:
+    __slots__ = ("ok", "latency", "phases", "error")
+
+    def __init__(self, ok: bool, latency: float, phases: Optional[Dict[str, Any]] = None, error: str = ""):
+        self.ok = ok
+        self.latency = latency
+        self.phases = phases or {}
+        self.error = error
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_spawn(args: argparse.Namespace, env: Dict[str, str]) -> Result:
+    """One request the way server.js serves it: a fresh client.py process spawning main.py."""
+    command = args.command.split() + [os.path.join(HERE, "client.py"), os.path.join(HERE, "..", "main.py"), args.query]
+    started = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        env={**env, "AKAIFE_SPAWNED_AT": repr(time.time())},
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), args.timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return Result(False, time.perf_counter() - started, error="timeout")
+    latency = time.perf_counter() - started
+
+    phases = {}
+    for line in stderr.decode(errors="replace").splitlines():
+        if line.startswith("AKAIFE_PHASES "):
+            phases = json.loads(line[len("AKAIFE_PHASES "):])
+    if proc.returncode != 0:
+        return Result(False, latency, phases, error=f"exit {proc.returncode}")
+    return Result(True, latency, phases)
+
+
+async def run_http(args: argparse.Namespace, env: Dict[str, str]) -> Result:
+    """One request against a running server.js."""
+    import httpx
+
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout) as client:
+            resp = await client.post(args.url, json={"query": args.query})
+    except httpx.HTTPError as e:
+        return Result(False, time.perf_counter() - started, error=type(e).__name__)
+    latency = time.perf_counter() - started
+    if resp.status_code != 200:
+        return Result(False, latency, error=f"HTTP {resp.status_code}")
+    return Result(True, latency)
+
+
+async def closed_loop(args: argparse.Namespace, send) -> List[Result]:
+    """`concurrency` workers, each sending its next request as soon as the previous one finishes."""
+    results: List[Result] = []
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if deadline is None:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            results.append(await send())
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return results
+
+
+async def open_loop(args: argparse.Namespace, send) -> List[Result]:
+    """Poisson arrivals at `rate` per second, at most `max_in_flight` outstanding."""
+    results: List[Result] = []
+    limit = asyncio.Semaphore(args.max_in_flight)
+    tasks = []
+    started = time.perf_counter()
+
+    async def one():
+        async with limit:
+            results.append(await send())
+
+    sent = 0
+    while True:
+        if args.duration and time.perf_counter() - started >= args.duration:
+            break
+        if not args.duration and sent >= args.requests:
+            break
+        tasks.append(asyncio.create_task(one()))
+        sent += 1
+        await asyncio.sleep(random.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def report(args: argparse.Namespace, results: List[Result], elapsed: float,
+           usage_before: resource.struct_rusage, usage_after: resource.struct_rusage,
+           llm_requests: Optional[int]) -> Dict[str, Any]:
+    ok = [r for r in results if r.ok]
+    latencies = [r.latency for r in ok]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if not r.ok:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    phases = {}
+    for phase in PHASES:
+        values = [r.phases[phase] for r in ok if r.phases.get(phase) is not None]
+        if values:
+            phases[phase] = {"p50": percentile(values, 50), "p99": percentile(values, 99), "mean": statistics.fmean(values)}
+
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    return {
+        "target": args.target,
+        "mode": f"rate {args.rate}/s" if args.rate else f"concurrency {args.concurrency}",
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=0.0),
+        },
+        "phases_s": phases,
+        "resources": {
+            # Only processes spawned by this harness are counted (spawn target)
+            "child_cpu_s": cpu,
+            "child_cpu_per_request_s": cpu / len(results) if results else 0.0,
+            "child_max_rss_mb": usage_after.ru_maxrss / 1024,
+            "load_avg_1m": os.getloadavg()[0],
+        },
+        "llm_requests": llm_requests,
+    }
+
+
+def print_report(r: Dict[str, Any]) -> None:
+    print(f"Target: {r['target']}, {r['mode']}")
+    print(f"Requests: {r['requests']} ({r['ok']} ok), errors: {r['errors'] or 'none'}")
+    print(f"Throughput: {r['throughput_rps']:.2f} req/s over {r['elapsed_s']:.1f}s")
+    lat = r["latency_s"]
+    print(f"Latency: p50 {lat['p50']:.2f}s  p90 {lat['p90']:.2f}s  p99 {lat['p99']:.2f}s  max {lat['max']:.2f}s")
+    if r["phases_s"]:
+        print("Phases (per request):")
+        for phase, v in r["phases_s"].items():
+            print(f"  {phase:<13} p50 {v['p50']:.3f}s  p99 {v['p99']:.3f}s  mean {v['mean']:.3f}s")
+    res = r["resources"]
+    print(f"Resources: child CPU {res['child_cpu_s']:.1f}s ({res['child_cpu_per_request_s']:.2f}s/request), "
+          f"child max RSS {res['child_max_rss_mb']:.0f} MB, load avg {res['load_avg_1m']:.2f}")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Load generator for the /query pipeline.")
+    parser.add_argument("--target", choices=("spawn", "http"), default="spawn")
+    parser.add_argument("--url", default="http://localhost:5000/query", help="server.js /query URL (http target).")
+    parser.add_argument("--command", default=f"{sys.executable}",
+                        help="Command that runs client.py, e.g. 'uv run' to match server.js (spawn target).")
+    parser.add_argument("--query", default="When is the next train from Tbilisi to Batumi?")
+    parser.add_argument("--concurrency", type=int, default=4, help="Closed-loop workers.")
+    parser.add_argument("--rate", type=float, help="Open-loop Poisson arrival rate (requests/s).")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Cap on outstanding requests (open loop).")
+    parser.add_argument("--requests", type=int, default=20, help="Total requests (ignored with --duration).")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of a request count.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--llm-url", help="Use an already running fake (or real) Messages API instead "
+                                          "(required with the http target).")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--script", help="JSON script for the fake Messages API.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+    if args.target == "http" and not args.llm_url:
+        # server.js reads ANTHROPIC_BASE_URL at startup, so it cannot be pointed at a fake started here
+        parser.error("--target http needs --llm-url, the Messages API server.js was started with")
+
+    fake = None
+    llm_url = args.llm_url
+    if not llm_url:
+        fake = FakeAnthropic(load_script(args.script), args.llm_latency_ms)
+        llm_url = fake.serve()
+    env = {**os.environ, "ANTHROPIC_BASE_URL": llm_url, "ANTHROPIC_API_KEY": "fake-key", "AKAIFE_PHASE_TIMINGS": "1"}
+
+    async def send() -> Result:
+        return await (run_spawn(args, env) if args.target == "spawn" else run_http(args, env))
+
+    usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.perf_counter()
+    try:
+        results = await (open_loop(args, send) if args.rate else closed_loop(args, send))
+    finally:
+        if fake is not None:
+            fake.shutdown()
+    elapsed = time.perf_counter() - started
+    usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    r = report(args, results, elapsed, usage_before, usage_after, fake.requests if fake else None)
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print_report(r)
+    return 0 if r["ok"] == r["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
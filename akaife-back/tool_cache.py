@@ -0,0 +1,87 @@
+"""
+Session-scoped memoization of MCP tool results for MCPClient.
+
+The model often repeats a call within one conversation (the station list,
+rental locations, the same journey lookup). Results are cached per tool name
+and canonicalized arguments, with a per-tool TTL, in a bounded LRU. Tools that
+are not deterministic or have side effects are never cached; neither are
+error results. Set AKAIFE_TOOL_CACHE=0 to disable the cache.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Catalogs change rarely, availability changes within minutes
+CATALOG_TTL = 6 * 3600
+AVAILABILITY_TTL = 120
+
+# Seconds to keep a result per tool; tools not listed here are never cached
+TOOL_TTLS: Dict[str, float] = {
+    "Railway_Stations": CATALOG_TTL,
+    "List_Rental_Locations": CATALOG_TTL,
+    "Find_Sightseeings_By_Description": CATALOG_TTL,
+    "Plan_Journey": AVAILABILITY_TTL,
+    "Plan_Journey_With_Transfers": AVAILABILITY_TTL,
+    "Search_Rental_Cars": AVAILABILITY_TTL,
+    "Get_Some_Spots_Around_Location": CATALOG_TTL,
+    # Current_Time, Open_URL_in_Browser and Refresh_Ride_Availability are deliberately absent
+}
+
+
+def cache_enabled() -> bool:
+    return os.getenv("AKAIFE_TOOL_CACHE", "1") not in ("0", "false", "")
+
+
+def canonical_args(args: Optional[Dict[str, Any]]) -> str:
+    """Argument dict as a stable string: key order and whitespace do not matter."""
+    return json.dumps(args or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class ToolCache:
+    """
+    Args:
+        max_entries (int): Least recently used results are evicted beyond this.
+        ttls (Dict[str, float]): TTL in seconds per tool name, defaults to TOOL_TTLS.
+    """
+
+    def __init__(self, max_entries: int = 128, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = TOOL_TTLS if ttls is None else ttls
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def cacheable(self, tool_name: str, args: Optional[Dict[str, Any]]) -> bool:
+        # An explicit live lookup asks for fresh data
+        return self.ttls.get(tool_name, 0) > 0 and not (args or {}).get("live")
+
+    def get(self, tool_name: str, args: Optional[Dict[str, Any]]) -> Optional[Any]:
+        if not self.cacheable(tool_name, args):
+            return None
+        key = (tool_name, canonical_args(args))
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, tool_name: str, args: Optional[Dict[str, Any]], result: Any) -> None:
+        if not self.cacheable(tool_name, args) or getattr(result, "isError", False):
+            return
+        key = (tool_name, canonical_args(args))
+        self._entries[key] = (time.monotonic() + self.ttls[tool_name], result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,184 @@
+"""
+Summarizes agent traces written by MCPClient (see tracing.py).
+
+Prints per-phase and per-tool latency tables over many traces, the most
+common turn patterns (the tool sequence the model went through) with their
+latency, and flags the slowest tool, the slowest patterns and the slowest
+queries with the span that dominated each. With --trace it instead prints
+the span timeline of a single trace.
+
+Usage:
+    python trace_summary.py                         # default trace file
+    python trace_summary.py traces/*.jsonl --top 10
+    python trace_summary.py --trace 3f2a...         # timeline of one trace
+"""
+import argparse
+import json
+import statistics
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+from tracing import trace_file
+
+
+def load_traces(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    traces = []
+    for path in paths:
+        try:
+            f = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            # Nothing was traced yet (the sink is created by the first query)
+            print(f"No trace file at {path}", file=sys.stderr)
+            continue
+        with f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        traces.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        print(f"Skipping malformed line in {path}", file=sys.stderr)
+    return traces
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def latency_row(label: str, values: List[float], width: int = 28) -> str:
+    return (f"  {label:<{width}} {len(values):>6} {percentile(values, 50):>8.2f} {percentile(values, 90):>8.2f} "
+            f"{percentile(values, 99):>8.2f} {max(values):>8.2f} {sum(values):>9.1f}")
+
+
+def latency_header(label: str, width: int = 28) -> str:
+    return f"  {label:<{width}} {'count':>6} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8} {'max s':>8} {'total s':>9}"
+
+
+def turn_pattern(trace: Dict[str, Any]) -> str:
+    """The tool calls of each LLM turn, e.g. "Railway_Stations > Plan_Journey,Plan_Journey > answer"."""
+    by_turn: Dict[int, List[str]] = defaultdict(list)
+    for span in trace["spans"]:
+        if span["kind"] == "tool":
+            by_turn[span.get("turn", 0)].append(span["name"])
+    steps = [",".join(by_turn[t]) for t in sorted(by_turn)]
+    return " > ".join(steps + ["answer"]) if not trace.get("error") else " > ".join(steps + [f"error:{trace['error']}"])
+
+
+def summarize(traces: List[Dict[str, Any]], top: int) -> None:
+    print(f"{len(traces)} traces")
+    if not traces:
+        return
+
+    # Per-phase: total time per kind in each trace
+    per_phase: Dict[str, List[float]] = defaultdict(list)
+    for trace in traces:
+        totals: Dict[str, float] = defaultdict(float)
+        for span in trace["spans"]:
+            totals[span["kind"]] += span["duration"]
+        for kind, total in totals.items():
+            per_phase[kind].append(total)
+        per_phase["query (end to end)"].append(trace["duration"])
+    print("\nPer-phase time per query")
+    print(latency_header("phase"))
+    for kind, values in sorted(per_phase.items(), key=lambda kv: -sum(kv[1])):
+        print(latency_row(kind, values))
+
+    # Per-tool calls
+    per_tool: Dict[str, List[float]] = defaultdict(list)
+    sizes: Dict[str, List[int]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    hits: Dict[str, int] = defaultdict(int)
+    for trace in traces:
+        for span in trace["spans"]:
+            if span["kind"] == "tool":
+                per_tool[span["name"]].append(span["duration"])
+                sizes[span["name"]].append(span.get("result_bytes", 0))
+                errors[span["name"]] += bool(span.get("is_error") or span.get("error"))
+                hits[span["name"]] += span.get("cache") == "hit"
+    if per_tool:
+        print("\nTool calls")
+        print(latency_header("tool") + f" {'result KB':>10} {'errors':>7} {'cached':>7}")
+        for name, values in sorted(per_tool.items(), key=lambda kv: -sum(kv[1])):
+            print(latency_row(name, values) + f" {statistics.fmean(sizes[name]) / 1024:>10.1f} {errors[name]:>7} {hits[name]:>7}")
+
+    # LLM turns
+    llm = [s for t in traces for s in t["spans"] if s["kind"] == "llm"]
+    if llm:
+        turns = [t.get("llm_turns", 0) for t in traces]
+        print(f"\nLLM: {len(llm)} turns, {statistics.fmean(turns):.1f} per query (max {max(turns)}), "
+              f"mean {statistics.fmean(s.get('input_tokens', 0) for s in llm):.0f} input / "
+              f"{statistics.fmean(s.get('output_tokens', 0) for s in llm):.0f} output tokens per turn")
+
+    # Turn patterns
+    patterns: Dict[str, List[float]] = defaultdict(list)
+    for trace in traces:
+        patterns[turn_pattern(trace)].append(trace["duration"])
+    print("\nTurn patterns")
+    print(latency_header("pattern", 60))
+    for pattern, values in sorted(patterns.items(), key=lambda kv: -len(kv[1]))[:top]:
+        print(latency_row(pattern[:60], values, 60))
+
+    # Flags
+    print("\nFlags")
+    if per_tool:
+        slowest_tool = max(per_tool.items(), key=lambda kv: percentile(kv[1], 99))
+        busiest_tool = max(per_tool.items(), key=lambda kv: sum(kv[1]))
+        print(f"  slowest tool (p99): {slowest_tool[0]} at {percentile(slowest_tool[1], 99):.2f}s")
+        print(f"  most total tool time: {busiest_tool[0]} with {sum(busiest_tool[1]):.1f}s "
+              f"over {len(busiest_tool[1])} calls")
+        repeats = sum(
+            len(calls) - len(set(calls))
+            for calls in ([(s["name"], s.get("args_bytes")) for s in t["spans"]
+                           if s["kind"] == "tool" and s.get("cache") != "hit"] for t in traces)
+        )
+        if repeats:
+            print(f"  {repeats} uncached tool calls looked like repeats within the same query (same tool, same args size)")
+        if sum(hits.values()):
+            print(f"  {sum(hits.values())} tool calls were served from the client's tool cache")
+    slowest_pattern = max(patterns.items(), key=lambda kv: statistics.fmean(kv[1]))
+    print(f"  slowest turn pattern (mean): {slowest_pattern[0]} at {statistics.fmean(slowest_pattern[1]):.2f}s")
+    print("  slowest queries:")
+    for trace in sorted(traces, key=lambda t: -t["duration"])[:top]:
+        dominant = max(trace["spans"], key=lambda s: s["duration"], default=None)
+        where = f"{dominant['kind']} '{dominant['name']}' {dominant['duration']:.2f}s" if dominant else "no spans"
+        print(f"    {trace['duration']:7.2f}s  {trace['trace_id']}  longest span: {where}")
+
+
+def timeline(trace: Dict[str, Any], width: int = 60) -> None:
+    total = max(trace["duration"], 1e-9)
+    print(f"Trace {trace['trace_id']}  {trace['duration']:.2f}s  "
+          f"{trace.get('llm_turns', 0)} LLM turns, {trace.get('tool_calls', 0)} tool calls")
+    for span in trace["spans"]:
+        start = int(span["start"] / total * width)
+        length = max(1, int(span["duration"] / total * width))
+        bar = " " * start + "#" * min(length, width - start)
+        extra = {k: v for k, v in span.items() if k not in ("name", "kind", "start", "duration")}
+        print(f"  {span['kind']:<10} {span['name'][:22]:<22} |{bar:<{width}}| "
+              f"{span['start']:7.2f}s +{span['duration']:6.2f}s {json.dumps(extra) if extra else ''}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Summarize MCPClient agent traces.")
+    parser.add_argument("files", nargs="*", help="Trace JSONL files (default: the client's trace file).")
+    parser.add_argument("--top", type=int, default=5, help="How many patterns and slow queries to list.")
+    parser.add_argument("--trace", help="Print the span timeline of the trace with this id (prefix is enough).")
+    args = parser.parse_args()
+
+    files = args.files or [trace_file()]
+    traces = load_traces(f for f in files if f)
+    if args.trace:
+        matches = [t for t in traces if t["trace_id"].startswith(args.trace)]
+        if not matches:
+            print(f"No trace matching '{args.trace}'", file=sys.stderr)
+            return 1
+        for trace in matches:
+            timeline(trace)
+        return 0
+    summarize(traces, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Per-query agent traces for MCPClient.
+
+A trace is one /query: a list of spans (MCP connect, tool listing, every LLM
+turn and every tool call) with start offsets, durations and attributes such
+as token counts or payload sizes. Finished traces are appended as one JSON
+line each to a local sink (AKAIFE_TRACE_FILE, default traces/agent-traces.jsonl
+next to this file; set it to an empty string to disable tracing).
+trace_summary.py aggregates them.
+"""
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces", "agent-traces.jsonl")
+
+
+def trace_file() -> Optional[str]:
+    path = os.getenv("AKAIFE_TRACE_FILE", DEFAULT_TRACE_FILE)
+    return path or None
+
+
+def payload_size(value: Any) -> int:
+    """Approximate size in bytes of a tool argument or result, as JSON."""
+    try:
+        return len(json.dumps(value, default=lambda o: o.model_dump() if hasattr(o, "model_dump") else str(o)))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+class Span:
+    __slots__ = ("name", "kind", "start", "duration", "attrs")
+
+    def __init__(self, name: str, kind: str, start: float, attrs: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.duration = 0.0
+        self.attrs = attrs
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "kind": self.kind, "start": self.start, "duration": self.duration, **self.attrs}
+
+
+class Tracer:
+    """
+    Collects the spans of one query.
+
+    Span kinds: "mcp_spawn", "mcp_init", "list_tools", "llm", "tool".
+    """
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: List[Span] = []
+        self.attrs: Dict[str, Any] = {}
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attrs: Any) -> Iterator[Span]:
+        """Times the block; attributes can be added to the yielded span while it runs."""
+        span = Span(name, kind, time.perf_counter() - self._t0, attrs)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - self._t0 - span.start
+            self.spans.append(span)
+
+    def phase_totals(self) -> Dict[str, float]:
+        """Total time per span kind."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.kind] = totals.get(span.kind, 0.0) + span.duration
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "duration": time.perf_counter() - self._t0,
+            **self.attrs,
+            "spans": [s.to_dict() for s in sorted(self.spans, key=lambda s: s.start)],
+        }
+
+    def write(self, path: Optional[str] = None) -> None:
+        """Appends the trace as one JSON line. A single O_APPEND write keeps concurrent writers from interleaving."""
+        path = path or trace_file()
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        line = (json.dumps(self.to_dict(), ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
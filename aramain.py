@@ -1,5 +1,6 @@
 # aramain.py - Full Script Modified to Run Server Directly
 
+import asyncio
 import ssl
 import urllib.request
 import urllib.parse
@@ -7,6 +8,7 @@ import json
 import sys
 import re
 import os
+import threading
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from pydantic import (
@@ -17,9 +19,6 @@ from pydantic import (
     ValidationError,
 )
 from mcp.server.fastmcp import FastMCP
-import webbrowser
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, OperationFailure
 from dotenv import load_dotenv
 
 # --- Load Environment Variables ---
@@ -46,31 +45,22 @@ if not MONGODB_COLLECTION:
     sys.exit(1)
 
 # --- Database Connection ---
+# Connected on first use rather than at import, so spawning the server (and
+# answering list_tools) does not wait on a MongoDB round trip.
 mongo_client = None
 db = None
 sightseeing_collection = None
-try:
-    print("Attempting to connect to MongoDB Atlas...", file=sys.stderr)
-    uri = os.getenv("MONGODB_URI")
-    mongo_client = MongoClient(
-        MONGODB_URI,
-        serverSelectionTimeoutMS=5000,
-        appName="MCPSightseeingGuide",
-    )
-    mongo_client.admin.command("ismaster")
-    db = mongo_client.get_database(os.getenv("MONGODB_DATABASE"))
-    coll = db.get_collection(os.getenv("MONGODB_COLLECTION"))
-    mongo_client.admin.command("ismaster")
-    print(
-        f"Successfully connected to MongoDB Atlas. Database: '{MONGODB_DATABASE}', Collection: '{MONGODB_COLLECTION}'", file=sys.stderr
-    )
-    db = mongo_client[MONGODB_DATABASE]
-    sightseeing_collection = db[MONGODB_COLLECTION]
-
-    # --- Verify the text index exists ---
+# Searches run in worker threads; only one of them may open the connection
+_mongo_lock = threading.Lock()
+
+
+def verify_text_index(collection) -> None:
+    """Warns on stderr if the text index the search tool relies on is missing."""
+    from pymongo.errors import OperationFailure
+
     try:
         print("Verifying index information...", file=sys.stderr)
-        index_info = sightseeing_collection.index_information()
+        index_info = collection.index_information()
         # print(f"Raw index info from pymongo: {index_info}", file=sys.stderr) # Optional debug
 
         text_index_exists = False
@@ -97,12 +87,56 @@ try:
     except Exception as e:
         print(f"Warning: An unexpected error occurred during index verification: {e!r}", file=sys.stderr)
 
-except ConnectionFailure as e:
-    print(f"CRITICAL ERROR: Failed to connect to MongoDB Atlas: {e}", file=sys.stderr)
-    sys.exit(1)
-except Exception as e:
-    print(f"CRITICAL ERROR: An unexpected error occurred during MongoDB setup: {e!r}", file=sys.stderr)
-    sys.exit(1)
+
+def get_sightseeing_collection():
+    """Connects to MongoDB Atlas on first call and returns the sightseeing collection."""
+    global mongo_client, db, sightseeing_collection
+    if sightseeing_collection is not None:
+        return sightseeing_collection
+
+    with _mongo_lock:
+        if sightseeing_collection is not None:
+            return sightseeing_collection
+
+        # pymongo is imported here too: it is the heaviest import of this server
+        from pymongo import MongoClient
+        from pymongo.errors import ConnectionFailure
+
+        try:
+            print("Attempting to connect to MongoDB Atlas...", file=sys.stderr)
+            client = MongoClient(
+                MONGODB_URI,
+                serverSelectionTimeoutMS=5000,
+                appName="MCPSightseeingGuide",
+            )
+            client.admin.command("ismaster")
+            print(
+                f"Successfully connected to MongoDB Atlas. Database: '{MONGODB_DATABASE}', Collection: '{MONGODB_COLLECTION}'", file=sys.stderr
+            )
+        except ConnectionFailure as e:
+            print(f"CRITICAL ERROR: Failed to connect to MongoDB Atlas: {e}", file=sys.stderr)
+            raise ValueError("Database connection is not available.")
+        except Exception as e:
+            print(f"CRITICAL ERROR: An unexpected error occurred during MongoDB setup: {e!r}", file=sys.stderr)
+            raise ValueError("Database connection is not available.")
+
+        mongo_client = client
+        db = mongo_client[MONGODB_DATABASE]
+        sightseeing_collection = db[MONGODB_COLLECTION]
+        verify_text_index(sightseeing_collection)
+        return sightseeing_collection
+
+
+def close_mongo_client() -> None:
+    """Closes the MongoDB connection, if one was opened."""
+    global mongo_client, db, sightseeing_collection
+    if mongo_client:
+        try:
+            mongo_client.close()
+            print("MongoDB connection closed after server shutdown.", file=sys.stderr)
+        except Exception as close_err:
+            print(f"Error closing MongoDB connection during shutdown: {close_err}", file=sys.stderr)
+        mongo_client = db = sightseeing_collection = None
 
 
 # --- MCP Initialization ---
@@ -110,6 +144,10 @@ mcp = FastMCP("Georgian_Sightseeing_Finder_Service")
 
 
 # --- Pydantic Models for Sightseeing Data ---
+LAT_RE = re.compile(r"lat=([+-]?\d+\.?\d*)", re.IGNORECASE)
+LNG_RE = re.compile(r"lng=([+-]?\d+\.?\d*)", re.IGNORECASE)
+
+
 class SightseeingSpot(BaseModel):
     """Represents a single sightseeing spot retrieved from the database."""
     id: str = Field(..., alias="_id")
@@ -130,8 +168,8 @@ class SightseeingSpot(BaseModel):
         if isinstance(data, dict):
             location_str = data.get("Location Info")
             if isinstance(location_str, str):
-                lat_match = re.search(r"lat=([+-]?\d+\.?\d*)", location_str, re.IGNORECASE)
-                lng_match = re.search(r"lng=([+-]?\d+\.?\d*)", location_str, re.IGNORECASE)
+                lat_match = LAT_RE.search(location_str)
+                lng_match = LNG_RE.search(location_str)
                 if lat_match and lng_match:
                     try:
                         data["latitude"] = float(lat_match.group(1))
@@ -163,15 +201,18 @@ class SightseeingListResponse(BaseModel):
 
 # --- MCP Tool for Sightseeing Search ---
 @mcp.tool(name="Find_Sightseeings_By_Description")
-def find_sightseeings_by_description(
+async def find_sightseeings_by_description(
     query_description: str, limit: int = 1
 ) -> SightseeingListResponse:
     """
     Finds Georgian sightseeing spots matching a user's descriptive query... (rest of docstring)
     """
-    if mongo_client is None or sightseeing_collection is None:
-        print("ERROR in Find_Sightseeings: Database connection object is None.", file=sys.stderr)
-        raise ValueError("Database connection is not available.")
+    # pymongo blocks; in HTTP mode other sessions share this worker's event loop
+    return await asyncio.to_thread(search_sightseeings, query_description, limit)
+
+
+def search_sightseeings(query_description: str, limit: int = 1) -> SightseeingListResponse:
+    """Runs the MongoDB text search behind Find_Sightseeings_By_Description."""
     if not query_description or not query_description.strip():
         raise ValueError("Query description cannot be empty.")
 
@@ -179,8 +220,11 @@ def find_sightseeings_by_description(
     print(f"Executing MongoDB Text Search for: \"{query_description.strip()}\"", file=sys.stderr)
     print(f"Query Filter: {query_filter}", file=sys.stderr)
 
+    collection = get_sightseeing_collection()
+    from pymongo.errors import OperationFailure
+
     try:
-        mongo_docs_cursor = sightseeing_collection.find(query_filter).limit(limit)
+        mongo_docs_cursor = collection.find(query_filter).limit(limit)
         spots = []
         processed_ids = set()
         for doc in mongo_docs_cursor:
@@ -209,7 +253,7 @@ def find_sightseeings_by_description(
         else:
             raise ValueError(f"Database query error occurred: {error_detail}")
     except Exception as e:
-        print(f"ERROR: Unexpected error in find_sightseeings_by_description: {e!r}", file=sys.stderr)
+        print(f"ERROR: Unexpected error in search_sightseeings: {e!r}", file=sys.stderr)
         raise ValueError("An unexpected server error occurred while searching.")
 
 
@@ -224,6 +268,8 @@ def open_url_in_browser(url: str) -> str:
     """Opens the given URL in the default web browser."""
     if not url or not url.startswith(("http://", "https://")):
         return f"Failed to open URL: Invalid or missing URL provided ('{url}')."
+    import webbrowser
+
     try:
         print(f"Attempting to open URL in browser: {url}", file=sys.stderr)
         success = webbrowser.open(url, new=2)
@@ -236,15 +282,31 @@ def open_url_in_browser(url: str) -> str:
 
 # --- Server Execution / Testing Block ---
 
+async def close_resources() -> None:
+    """Shutdown hook of the streamable HTTP mode."""
+    close_mongo_client()
+
+
+def create_http_app():
+    """App factory for the streamable HTTP mode, called once in every worker process."""
+    from serve_http import build_app
+
+    return build_app(mcp, on_shutdown=close_resources)
+
+
 if __name__ == "__main__":
     # This block NOW runs the server when script is executed directly
     # (e.g., by Claude using `.venv/bin/python aramain.py`)
+    from serve_http import parse_args, serve
+
+    args = parse_args("Georgian sightseeing MCP server", default_port=8001)
     try:
-        print("Starting FastMCP server (direct execution)...", file=sys.stderr)
-        # --- IMPORTANT ---
-        # Assuming mcp.run() is the correct method for FastMCP to start listening
-        # on stdio for MCP messages. Verify with FastMCP documentation if needed.
-        mcp.run()
+        if args.transport == "stdio":
+            print("Starting FastMCP server (direct execution)...", file=sys.stderr)
+            mcp.run()
+        else:
+            # Each worker connects to MongoDB on its own and closes it in close_resources
+            serve("aramain:create_http_app", args)
         print("FastMCP server finished running.", file=sys.stderr)
     except KeyboardInterrupt:
          print("\nServer stopped by user (Ctrl+C).", file=sys.stderr)
@@ -253,12 +315,7 @@ if __name__ == "__main__":
         sys.exit(1) # Exit if server crashes during run
     finally:
         # Cleanup: Close the MongoDB connection when the server stops or crashes
-        if mongo_client:
-            try:
-                mongo_client.close()
-                print("MongoDB connection closed after server shutdown.", file=sys.stderr)
-            except Exception as close_err:
-                print(f"Error closing MongoDB connection during shutdown: {close_err}", file=sys.stderr)
+        close_mongo_client()
 
     # --- Testing code is now commented out or moved ---
     # If you want to run tests, create a separate test_aramain.py file
@@ -0,0 +1,133 @@
+"""
+Startup benchmark for the MCP servers.
+
+Measures, over several fresh interpreter runs:
+    - import time of the server module (`python -X importtime`), with the
+      slowest modules by self time so regressions are easy to pin down;
+    - time from spawning the server over stdio to the first `list_tools` reply,
+      which is what every /query request pays.
+
+Exits with status 1 if the median of either measurement is over its budget,
+or if a module that the server is meant to import lazily (googlemaps,
+pymongo, ...) is imported at startup. Budgets are the measured baseline
+(about 450 ms import, 500 ms to list_tools) plus a margin; on slower machines
+raise them with STARTUP_IMPORT_BUDGET_MS / STARTUP_LIST_TOOLS_BUDGET_MS.
+tests/test_startup.py runs the same checks under pytest; the budgets there
+only with STARTUP_BUDGET_TESTS=1.
+
+Usage:
+    python bench_startup.py                      # main.py with default budgets
+    python bench_startup.py --server aramain.py --runs 10 --list-tools-budget-ms 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 600))
+LIST_TOOLS_BUDGET_MS = float(os.getenv("STARTUP_LIST_TOOLS_BUDGET_MS", 700))
+
+# Modules each server must only import on first use
+LAZY_MODULES = {
+    "main.py": ("googlemaps", "requests", "mapsAPIutils", "places_scheduler", "webbrowser", "serve_http"),
+    "aramain.py": ("pymongo", "bson", "webbrowser", "serve_http"),
+}
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, int]]:
+    """Returns the cumulative import time of `module` in ms and the self time (us) of every module."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    self_us: Dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = [f.strip() for f in line[len("import time:"):].split("|")]
+        if not fields[0].isdigit():
+            continue  # header line
+        name = fields[2]
+        self_us[name] = int(fields[0])
+        if name == module:
+            total_us = int(fields[1])
+    return total_us / 1000, self_us
+
+
+def eager_imports(server: str, self_us: Dict[str, int]) -> List[str]:
+    """Modules from LAZY_MODULES that were imported at startup, given measure_import's per-module times."""
+    return [name for name in LAZY_MODULES.get(server, ()) if name in self_us]
+
+
+async def measure_list_tools(script: str) -> float:
+    """Milliseconds from spawning the server to its first list_tools reply."""
+    # The SDK would otherwise pass only a few safe variables (PATH, HOME, ...) to the server
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(HERE, script)], env={**os.environ})
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await session.list_tools()
+                return (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark MCP server startup against a budget.")
+    parser.add_argument("--server", default="main.py", help="Server script to benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--list-tools-budget-ms", type=float, default=LIST_TOOLS_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="How many slowest modules to show.")
+    args = parser.parse_args()
+
+    module = os.path.splitext(os.path.basename(args.server))[0]
+    import_ms: List[float] = []
+    self_times: Dict[str, List[int]] = {}
+    for _ in range(args.runs):
+        total, per_module = measure_import(module)
+        import_ms.append(total)
+        for name, us in per_module.items():
+            self_times.setdefault(name, []).append(us)
+
+    list_tools_ms = [asyncio.run(measure_list_tools(args.server)) for _ in range(args.runs)]
+
+    import_median = statistics.median(import_ms)
+    list_tools_median = statistics.median(list_tools_ms)
+
+    print(f"Startup benchmark for {args.server} ({args.runs} runs)")
+    print(f"  import time:           median {import_median:8.1f} ms  max {max(import_ms):8.1f} ms  "
+          f"budget {args.import_budget_ms:.0f} ms")
+    print(f"  spawn -> list_tools:   median {list_tools_median:8.1f} ms  max {max(list_tools_ms):8.1f} ms  "
+          f"budget {args.list_tools_budget_ms:.0f} ms")
+    print("  slowest modules by self time (median):")
+    slowest = sorted(self_times.items(), key=lambda kv: statistics.median(kv[1]), reverse=True)[:args.top]
+    for name, samples in slowest:
+        print(f"    {statistics.median(samples) / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = eager_imports(args.server, self_times)
+    if eager:
+        print(f"FAIL: imported at startup but meant to be lazy: {', '.join(eager)}")
+        failed = True
+    if import_median > args.import_budget_ms:
+        print(f"FAIL: import time over budget by {import_median - args.import_budget_ms:.1f} ms")
+        failed = True
+    if list_tools_median > args.list_tools_budget_ms:
+        print(f"FAIL: time to first list_tools over budget by {list_tools_median - args.list_tools_budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
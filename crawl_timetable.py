@@ -0,0 +1,96 @@
+"""
+Nightly Georgian Railway timetable crawler.
+
+Enumerates station pairs from the station catalog, queries ticket-search for
+each pair over the next N days with a polite concurrency limit, and stores the
+rides in the local timetable snapshot used by Plan_Journey.
+
+Pairs that had rides in an earlier crawl are treated as the active set. With
+--discover (or against an empty store) every catalog pair is tried on the
+first day only, and the following days crawl just the pairs that had rides on
+it. A service that does not run on the discovery day is found by a later
+--discover run on a day it runs.
+
+Usage:
+    python crawl_timetable.py --days 14 --concurrency 2
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+from main import fetch_rides, get_stations
+from timetable_store import DEFAULT_DB_PATH, TimetableStore
+from upstream import aclose_all
+
+
+async def crawl(store: TimetableStore, days: int, concurrency: int, discover: bool) -> int:
+    stations = [s for s in (await get_stations()).stations if not s.hide]
+    codes = sorted({s.station_code for s in stations})
+
+    known: Set[Tuple[str, str]] = store.active_pairs()
+    discover = discover or not known
+    pairs: List[Tuple[str, str]] = [(a, b) for a in codes for b in codes if a != b] if discover else sorted(known)
+    print(f"[crawler] {len(codes)} stations, {len(pairs)} pairs{' (discovery)' if discover else ''}, {days} days",
+          file=sys.stderr)
+
+    limit = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def crawl_one(start_code: str, end_code: str, date_str: str) -> Optional[bool]:
+        """Returns whether the pair had any rides on that date, None if the query failed."""
+        nonlocal failures
+        async with limit:
+            try:
+                # No hedging: a duplicate would put more than `concurrency` requests in flight
+                rides = await fetch_rides(start_code, end_code, date_str, hedge=False)
+            except Exception as e:
+                failures += 1
+                print(f"[crawler] {start_code}->{end_code} {date_str} failed: {e!r}", file=sys.stderr)
+                return None
+        store.save(start_code, end_code, date_str, ((r.id, r.model_dump_json()) for r in rides))
+        return bool(rides)
+
+    today = datetime.now().date()
+    for offset in range(days):
+        date_str = (today + timedelta(days=offset)).isoformat()
+        started = time.perf_counter()
+        failures_before = failures
+        found = await asyncio.gather(*(crawl_one(a, b, date_str) for a, b in pairs))
+        if failures == failures_before:
+            store.mark_crawled(date_str)
+        print(
+            f"[crawler] {date_str}: {len(pairs)} pairs in {time.perf_counter() - started:.1f}s, "
+            f"{failures - failures_before} failed",
+            file=sys.stderr,
+        )
+        if offset == 0 and discover:
+            # The other days only need the pairs that run at all; failed ones are kept to try again
+            pairs = sorted(known | {pair for pair, has_rides in zip(pairs, found) if has_rides is not False})
+            print(f"[crawler] discovery: {len(pairs)} active pairs for the remaining days", file=sys.stderr)
+
+    store.prune(today.isoformat())
+    return failures
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Crawl Georgian Railway timetables into the local snapshot store.")
+    parser.add_argument("--days", type=int, default=14, help="How many days ahead to crawl, starting today.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Maximum ticket-search requests in flight.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite snapshot file.")
+    parser.add_argument("--discover", action="store_true", help="Crawl every catalog pair, not just known active ones.")
+    args = parser.parse_args()
+
+    store = TimetableStore(args.db)
+    try:
+        failures = await crawl(store, args.days, args.concurrency, args.discover)
+    finally:
+        store.close()
+        await aclose_all()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
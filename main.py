@@ -1,33 +1,54 @@
-import ssl
-import urllib.request
-import urllib.parse
+import asyncio
 import json
+import urllib.parse
 import sys
 import re
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from mcp.server.fastmcp import FastMCP
-import webbrowser
-import http.cookiejar
 
-from mapsAPIutils import search_places_nearby
+from timetable import RideCache, TimetableGraph, best_itineraries, segment_from_ride
+from timetable_store import TimetableStore
+from upstream import GR, MYAUTO, aclose_all, log_all_stats, with_deadline
 from utils import resolve_station_code
 
 mcp = FastMCP("GR Fetch")
 
+GR_TICKET_SEARCH_URL = "https://gr.com.ge/api/ticket-search"
+
+# Upper bound on a whole tool call, propagated to every upstream request it makes
+TOOL_DEADLINE_SECONDS = 20
+
+ride_cache = RideCache(ttl_seconds=900)
+
+# Nightly crawl (crawl_timetable.py) output; schedules older than this are ignored
+timetable_store = TimetableStore()
+SNAPSHOT_MAX_AGE = timedelta(hours=36)
+
+DATE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})$")
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 
 
-class BaseStation(BaseModel):
+class LazyModel(BaseModel):
+    """
+    Base for the upstream response models. Validators are built on first use
+    instead of at import, which keeps server startup cheap for sessions that
+    never touch the railway API.
+    """
+    model_config = ConfigDict(defer_build=True)
+
+
+class BaseStation(LazyModel):
     id: int
     code: str
     name: str
     cultureName: Optional[str] = None
 
 
-class StationInfo(BaseModel):
+class StationInfo(LazyModel):
     station: BaseStation
     id: int
     index: int
@@ -44,19 +65,19 @@ class StationInfo(BaseModel):
     dayNumber: int
 
 
-class RouteType(BaseModel):
+class RouteType(LazyModel):
     id: int
     code: str
     name: str
     cultureName: Optional[str] = None
 
 
-class Price(BaseModel):
+class Price(LazyModel):
     amount: float
     currencyCode: str
 
 
-class SeatClass(BaseModel):
+class SeatClass(LazyModel):
     id: int
     guid: str
     index: int
@@ -68,7 +89,7 @@ class SeatClass(BaseModel):
     isNumerised: bool
 
 
-class AvailableSeatsClass(BaseModel):
+class AvailableSeatsClass(LazyModel):
     seatClass: SeatClass
     availableNumberOfSeats: int
     priceOfSeats: Price
@@ -79,7 +100,7 @@ class AvailableSeatsClass(BaseModel):
     priceOfSeatsCash: Optional[Any]
 
 
-class Ride(BaseModel):
+class Ride(LazyModel):
     id: int
     guid: str
     directionId: int
@@ -101,7 +122,7 @@ class Ride(BaseModel):
     availableSeatsGroups: List[Any]
 
 
-class Station(BaseModel):
+class Station(LazyModel):
     id: int
     station_id: str
     priority: Optional[int] = None
@@ -118,21 +139,15 @@ class Station(BaseModel):
     deleted_at: Optional[datetime] = None
 
 
-class StationsResponse(BaseModel):
+class StationsResponse(LazyModel):
     stations: List[Station]
 
 
 @mcp.tool(name="Railway_Stations")
-def get_stations() -> StationsResponse:
-    url = "https://gr.com.ge/api/ticket-search"
-
-    ctx = ssl._create_unverified_context()
-
+@with_deadline(TOOL_DEADLINE_SECONDS)
+async def get_stations() -> StationsResponse:
     try:
-        with urllib.request.urlopen(url, context=ctx, timeout=10) as resp:
-            if resp.status != 200:
-                raise ValueError(f"HTTP {resp.status}")
-            data = json.load(resp)
+        data = await GR.get_json(GR_TICKET_SEARCH_URL)
         return StationsResponse(**data)
 
     except Exception as e:
@@ -148,17 +163,14 @@ def get_current_time() -> str:
     return datetime.now().isoformat()
 
 
-@mcp.tool(name="Plan_Journey")
-def plan_journey(origin: str, destination: str, when: str) -> Dict[str, Any]:
+def resolve_date(when: str) -> datetime:
     """
-    Plans a trip from origin to destination given a date phrase (e.g., "in a week").
-    Returns available rides and a purchase URL.
+    Resolves a date phrase ("today", "tomorrow", "in 3 days", "in 2 weeks" or YYYY-MM-DD).
     """
-    # 1) Resolve date phrase
     now = datetime.now()
     phrase = when.strip().lower()
     # Exact YYYY-MM-DD
-    m = re.match(r"^(\d{4}-\d{2}-\d{2})$", phrase)
+    m = DATE_RE.match(phrase)
     if phrase == "today":
         target_date = now
     elif phrase == "tomorrow":
@@ -181,16 +193,17 @@ def plan_journey(origin: str, destination: str, when: str) -> Dict[str, Any]:
         target_date = datetime.strptime(m.group(1), "%Y-%m-%d")
     else:
         raise ValueError(f"Could not parse date phrase: '{when}'")
-    date_str = target_date.date().isoformat()
+    return target_date
 
-    # 2) Map station names to codes using fuzzy matching
-    stations_data = get_stations()
-    orig_code = resolve_station_code(origin, stations_data.stations)
-    dest_code = resolve_station_code(destination, stations_data.stations)
-    if not orig_code or not dest_code:
-        raise ValueError("Origin or destination station not found")
 
-    # 3) Query availability
+async def fetch_rides(orig_code: str, dest_code: str, date_str: str, hedge: bool = True) -> List[Ride]:
+    """
+    Queries ticket-search for direct rides between two station codes on a date (YYYY-MM-DD).
+
+    Args:
+        hedge (bool): Allow a hedged duplicate request. Batch callers with their
+            own concurrency limit (the crawler) pass False to stay within it.
+    """
     payload = {
         "child_passengers": 0,
         "disabled_passengers": 0,
@@ -200,19 +213,8 @@ def plan_journey(origin: str, destination: str, when: str) -> Dict[str, Any]:
         "endStationCode": dest_code,
         "routeType": 0
     }
-    data = json.dumps(payload).encode()
-    headers = {"Content-Type": "application/json"}
-    req = urllib.request.Request(
-        "https://gr.com.ge/api/ticket-search",
-        data=data,
-        headers=headers,
-        method="POST"
-    )
-    ctx = ssl._create_unverified_context()
-    with urllib.request.urlopen(req, context=ctx, timeout=10) as resp:
-        if resp.status >= 300:
-            raise ValueError(f"HTTP {resp.status}")
-        results = json.load(resp)
+    # ticket-search is a read-only query despite being a POST, so it is safe to hedge
+    results = await GR.post_json(GR_TICKET_SEARCH_URL, payload, hedge=hedge)
 
     if results and isinstance(results[0], list):
         rides_data = [item for sublist in results for item in sublist]
@@ -222,13 +224,92 @@ def plan_journey(origin: str, destination: str, when: str) -> Dict[str, Any]:
     if isinstance(rides_data, dict) and 'rides' in rides_data:
         rides_data = rides_data['rides']
 
-    rides = [Ride(**r) for r in rides_data]
+    return [Ride(**r) for r in rides_data]
+
+
+def snapshot_rides(orig_code: str, dest_code: str, date_str: str) -> Optional[Tuple[List[Ride], datetime]]:
+    """
+    Rides for a pair/date from the timetable snapshot and the time they were crawled,
+    or None if the pair was not crawled recently. Seat counts and prices are as of the crawl.
+    """
+    snapshot = timetable_store.load(orig_code, dest_code, date_str, max_age=SNAPSHOT_MAX_AGE)
+    if snapshot is None:
+        return None
+    return [Ride.model_validate_json(payload) for payload in snapshot.rides], snapshot.fetched_at
+
+
+def snapshot_rides_on(date_str: str) -> Optional[List[Ride]]:
+    """
+    Every ride on a date from the timetable snapshot, or None if the date was not fully crawled recently.
+    """
+    if not timetable_store.is_crawled(date_str, max_age=SNAPSHOT_MAX_AGE):
+        return None
+    return [Ride.model_validate_json(payload) for payload in timetable_store.rides_on(date_str)]
+
+
+async def refresh_rides(orig_code: str, dest_code: str, date_str: str) -> List[Ride]:
+    """
+    Live ticket-search query that also updates the ride cache and the timetable snapshot.
+    """
+    rides = await fetch_rides(orig_code, dest_code, date_str)
+    ride_cache.put(orig_code, dest_code, date_str, rides)
+    # The SQLite commit would otherwise block every other request on the event loop
+    await asyncio.to_thread(timetable_store.save, orig_code, dest_code, date_str,
+                            [(r.id, r.model_dump_json()) for r in rides])
+    return rides
+
+
+async def get_rides(orig_code: str, dest_code: str, date_str: str) -> List[Ride]:
+    """
+    Same as fetch_rides, but served from the ride cache or the timetable snapshot when possible.
+    ride_cache.snapshot_at() tells which of the two it was.
+    """
+    rides = ride_cache.get(orig_code, dest_code, date_str)
+    if rides is None:
+        # SQLite reads and parsing the stored rides would block the event loop
+        snapshot = await asyncio.to_thread(snapshot_rides, orig_code, dest_code, date_str)
+        if snapshot is None:
+            return await refresh_rides(orig_code, dest_code, date_str)
+        rides, fetched_at = snapshot
+        ride_cache.put(orig_code, dest_code, date_str, rides, snapshot_at=fetched_at)
+    return rides
+
+
+@mcp.tool(name="Plan_Journey")
+@with_deadline(TOOL_DEADLINE_SECONDS)
+async def plan_journey(origin: str, destination: str, when: str, live: bool = False) -> Dict[str, Any]:
+    """
+    Plans a trip from origin to destination given a date phrase (e.g., "in a week").
+    Returns available rides and a purchase URL.
+    Schedules come from the nightly timetable snapshot when available ("source": "snapshot"),
+    in which case seats and prices may be stale: call Refresh_Ride_Availability for the rides
+    the user is interested in, or pass live=True to query everything live.
+    """
+    # 1) Resolve date phrase
+    date_str = resolve_date(when).date().isoformat()
+
+    # 2) Map station names to codes using fuzzy matching
+    stations_data = await get_stations()
+    orig_code = resolve_station_code(origin, stations_data.stations)
+    dest_code = resolve_station_code(destination, stations_data.stations)
+    if not orig_code or not dest_code:
+        raise ValueError("Origin or destination station not found")
+
+    # 3) Query availability
+    if live:
+        rides = await refresh_rides(orig_code, dest_code, date_str)
+        snapshot_at = None
+    else:
+        rides = await get_rides(orig_code, dest_code, date_str)
+        snapshot_at = ride_cache.snapshot_at(orig_code, dest_code, date_str)
 
     params = {
         "startStationCode": orig_code,
         "endStationCode": dest_code,
         "departureDateFrom": date_str,
-        **{k: payload[k] for k in ["standard_passengers", "child_passengers", "disabled_passengers"]}
+        "standard_passengers": 1,
+        "child_passengers": 0,
+        "disabled_passengers": 0,
     }
     purchase_url = f"https://gr.com.ge/en/search?{urllib.parse.urlencode(params)}"
 
@@ -237,12 +318,154 @@ def plan_journey(origin: str, destination: str, when: str) -> Dict[str, Any]:
         "origin": origin,
         "destination": destination,
         "rides": [r.model_dump() for r in rides],
-        "purchase_url": purchase_url
+        "purchase_url": purchase_url,
+        "source": "snapshot" if snapshot_at is not None else "live",
+        "snapshot_fetched_at": snapshot_at.isoformat() if snapshot_at is not None else None
+    }
+
+
+@mcp.tool(name="Refresh_Ride_Availability")
+@with_deadline(TOOL_DEADLINE_SECONDS)
+async def refresh_ride_availability(origin: str, destination: str, when: str,
+                                    ride_numbers: List[int]) -> Dict[str, Any]:
+    """
+    Fetches live seat availability and prices for specific rides returned by Plan_Journey.
+
+    Args:
+        origin (str): Origin station name, as passed to Plan_Journey.
+        destination (str): Destination station name, as passed to Plan_Journey.
+        when (str): Date phrase, as passed to Plan_Journey.
+        ride_numbers (List[int]): rideNumber values of the rides to refresh.
+
+    Returns:
+        Dict: The date and, for each requested ride that is still scheduled, its
+        departure/arrival times and current seat classes with availability and price.
+    """
+    date_str = resolve_date(when).date().isoformat()
+    stations_data = await get_stations()
+    orig_code = resolve_station_code(origin, stations_data.stations)
+    dest_code = resolve_station_code(destination, stations_data.stations)
+    if not orig_code or not dest_code:
+        raise ValueError("Origin or destination station not found")
+
+    wanted = set(ride_numbers)
+    rides = [r for r in await refresh_rides(orig_code, dest_code, date_str) if r.rideNumber in wanted]
+    return {
+        "date": date_str,
+        "rides": [
+            {
+                "rideNumber": r.rideNumber,
+                "departure": r.startStation.departureDateTime.isoformat(),
+                "arrival": r.endStation.arrivalDateTime.isoformat(),
+                "availableSeatsClasses": [c.model_dump() for c in r.availableSeatsClasses],
+            }
+            for r in rides
+        ],
+        "missing": sorted(wanted - {r.rideNumber for r in rides}),
+    }
+
+
+# Where trains can be changed, by station name (resolved like user input). Used
+# as transfer hubs for dates the nightly snapshot does not cover yet.
+JUNCTION_STATIONS = ("Tbilisi", "Khashuri", "Zestaponi", "Samtredia")
+MAX_TRANSFER_HUBS = 6
+
+
+def transfer_hubs(orig_code: str, dest_code: str, stations: List[Station]) -> List[str]:
+    """
+    Stations to try as the change between origin and destination: those the
+    snapshot knows to have rides from the origin and to the destination, or
+    else the known junctions. At most MAX_TRANSFER_HUBS.
+    """
+    active = timetable_store.active_pairs()
+    hubs = {b for a, b in active if a == orig_code} & {a for a, b in active if b == dest_code}
+    if not hubs:
+        hubs = {code for code in (resolve_station_code(name, stations) for name in JUNCTION_STATIONS) if code}
+    hubs -= {orig_code, dest_code}
+    return sorted(hubs)[:MAX_TRANSFER_HUBS]
+
+
+@mcp.tool(name="Plan_Journey_With_Transfers")
+@with_deadline(2 * TOOL_DEADLINE_SECONDS)
+async def plan_journey_with_transfers(
+        origin: str,
+        destination: str,
+        when: str,
+        min_transfer_minutes: int = 15,
+        max_transfers: int = 2
+) -> Dict[str, Any]:
+    """
+    Plans a rail trip that may need changing trains, in a single call.
+    Use this instead of trying station pairs one by one when Plan_Journey finds no direct ride.
+    For dates covered by the nightly timetable snapshot every connection is searched; otherwise
+    only direct rides and single-change trips via the main junctions are found.
+
+    Args:
+        origin (str): Origin station name.
+        destination (str): Destination station name.
+        when (str): Date phrase, same as Plan_Journey (e.g. "tomorrow", "2025-06-01").
+        min_transfer_minutes (int): Minimum time needed to change trains.
+        max_transfers (int): Maximum number of train changes (only more than one
+            for dates covered by the snapshot).
+
+    Returns:
+        Dict: The earliest-arrival and the cheapest itinerary (each with its legs,
+        times, transfers and total price) plus every other Pareto-optimal option.
+    """
+    target_date = resolve_date(when)
+    date_str = target_date.date().isoformat()
+    now = datetime.now()
+    if target_date.date() == now.date():
+        depart_after = now
+    else:
+        depart_after = datetime.combine(target_date.date(), datetime.min.time())
+
+    stations_data = await get_stations()
+    orig_code = resolve_station_code(origin, stations_data.stations)
+    dest_code = resolve_station_code(destination, stations_data.stations)
+    if not orig_code or not dest_code:
+        raise ValueError("Origin or destination station not found")
+    if orig_code == dest_code:
+        raise ValueError(f"Origin '{origin}' and destination '{destination}' resolve to the same station")
+
+    # The nightly snapshot may already cover every active pair for that date
+    rides = await asyncio.to_thread(snapshot_rides_on, date_str)
+    if rides is None:
+        # Direct rides plus origin->hub and hub->destination for a few hubs, fetched
+        # concurrently and cached for reuse. This only yields single-change trips.
+        hubs = await asyncio.to_thread(transfer_hubs, orig_code, dest_code,
+                                       [s for s in stations_data.stations if not s.hide])
+        pairs = [(orig_code, dest_code)] + [(orig_code, h) for h in hubs] + [(h, dest_code) for h in hubs]
+        fetched = await asyncio.gather(*(get_rides(a, b, date_str) for a, b in pairs), return_exceptions=True)
+        failed = sum(isinstance(r, Exception) for r in fetched)
+        if failed:
+            print(f"[gr_fetch] {failed}/{len(pairs)} timetable queries failed for {date_str}", file=sys.stderr)
+        rides = []
+
+    # The graph also picks up anything cached for that date by earlier calls
+    graph = TimetableGraph(segment_from_ride(r) for r in rides + ride_cache.rides_on(date_str))
+    itineraries = graph.search(
+        orig_code,
+        dest_code,
+        depart_after,
+        min_transfer=timedelta(minutes=min_transfer_minutes),
+        max_transfers=max_transfers,
+    )
+    best = best_itineraries(itineraries)
+
+    return {
+        "date": date_str,
+        "origin": origin,
+        "destination": destination,
+        "earliest_arrival": best["earliest_arrival"].model_dump() if best["earliest_arrival"] else None,
+        "cheapest": best["cheapest"].model_dump() if best["cheapest"] else None,
+        "options": [i.model_dump() for i in sorted(itineraries, key=lambda i: i.arrival)],
     }
 
 
 @mcp.tool(name="List_Rental_Locations")
-def list_rental_locations() -> list[dict]:
+@with_deadline(TOOL_DEADLINE_SECONDS)
+async def list_rental_locations() -> list[dict]:
     """
     Fetches all available rental-location IDs and names from MyAuto.ge.
 
@@ -255,39 +478,13 @@ def list_rental_locations() -> list[dict]:
             - parent_loc_id (int): Parent location ID, if any
             - ...any other fields the API provides
     """
-    # Prepare SSL context
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-
-    # Build a cookie-aware opener with browser headers
-    cj = http.cookiejar.CookieJar()
-    opener = urllib.request.build_opener(
-        urllib.request.HTTPCookieProcessor(cj)
-    )
-    opener.addheaders = [
-        ("User-Agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"),
-        ("Accept", "application/json, text/plain, */*"),
-        ("Accept-Language", "en-US,en;q=0.9"),
-        ("Referer", "https://www.myauto.ge/"),
-        ("Origin", "https://www.myauto.ge"),
-        ("X-Requested-With", "XMLHttpRequest"),
-    ]
-
-    # Seed cookies by "visiting" the main site
-    opener.open("https://www.myauto.ge/ka")
-
-    # Now fetch the rental locations
-    url = "https://api2.myauto.ge/ka/vehicle/locations"
-    req = urllib.request.Request(url)  # headers already on opener
-    with opener.open(req, timeout=10) as resp:
-        if resp.status != 200:
-            raise ValueError(f"HTTP {resp.status}")
-        return json.load(resp)
+    # The MyAuto client seeds its cookies from the main site on first use
+    return await MYAUTO.get_json("https://api2.myauto.ge/ka/vehicle/locations")
 
 
 @mcp.tool(name="Search_Rental_Cars")
-def search_rental_cars(
+@with_deadline(TOOL_DEADLINE_SECONDS)
+async def search_rental_cars(
         price_from: int = 0,
         price_to: int = 10000,
         currency_id: int = 1,
@@ -322,25 +519,6 @@ def search_rental_cars(
             - views (int): Total view count (as a proxy for popularity).
             - link (str): Public URL to the listing (e.g. https://www.myauto.ge/ka/pr/{car_id}).
     """
-    # -- prepare SSL & cookie-aware opener to mimic a real browser session --
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-
-    cj = http.cookiejar.CookieJar()
-    opener = urllib.request.build_opener(
-        urllib.request.HTTPCookieProcessor(cj)
-    )
-    opener.addheaders = [
-        ("User-Agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"),
-        ("Accept", "application/json, text/plain, */*"),
-        ("Accept-Language", "en-US,en;q=0.9"),
-        ("Referer", "https://www.myauto.ge/"),
-        ("Origin", "https://www.myauto.ge"),
-        ("X-Requested-With", "XMLHttpRequest"),
-    ]
-    opener.open("https://www.myauto.ge/ka")  # seed cookies
-
     base_url = "https://api2.myauto.ge/ka/products"
     params = {
         "TypeID": 0,
@@ -354,21 +532,18 @@ def search_rental_cars(
     params["Locs"] = locs
     params["WheelTypes"] = wheel_types
 
+    async def fetch_page(page: int) -> list:
+        # get_json raises on a non-200 answer (e.g. a 403 HTML page) instead of failing to parse it
+        data = await MYAUTO.get_json(base_url, params={**params, "Page": page})
+        return (data or {}).get("data", {}).get("items", [])
+
+    # Fetch the first four pages concurrently; stop at the first empty one
+    pages = await asyncio.gather(*(fetch_page(page) for page in range(1, 5)))
     all_cars = []
-    page = 1
-
-    # Page through until empty result
-    while page < 5:
-        params["Page"] = page
-        qs = urllib.parse.urlencode(params)
-        req = urllib.request.Request(f"{base_url}?{qs}")
-        with opener.open(req) as resp:
-            data = json.load(resp)
-            page_items = data.get("data", {}).get("items", [])
-        if not data:
+    for page_items in pages:
+        if not page_items:
             break
         all_cars.extend(page_items)
-        page += 1
 
     # Sort by USD price and take the top five
     top_five = sorted(all_cars, key=lambda c: c.get("price_usd", float("inf")))[:5]
@@ -390,12 +565,16 @@ def search_rental_cars(
 
 
 @mcp.tool(name="Get_Some_Spots_Around_Location")
-def get_some_spots_around_location(location: tuple[float, float], radius: int = 1000,
-                                   place_types: Optional[List[str]] = None) -> dict[str, list[dict[str, Any]]]:
+@with_deadline(TOOL_DEADLINE_SECONDS)
+async def get_some_spots_around_location(location: tuple[float, float], radius: int = 1000,
+                                         place_types: Optional[List[str]] = None) -> dict[str, list[dict[str, Any]]]:
     """
     Returns a list of places (restaurants, bars, cafes, partks etc) around the given location.
     """
-    result = search_places_nearby(location, radius, place_types)
+    # Imported lazily: the Google Maps client is only needed by this tool
+    from mapsAPIutils import search_places_nearby_async
+
+    result = await search_places_nearby_async(location, radius, place_types)
     return {
         "places": [
             {
@@ -410,11 +589,21 @@ def get_some_spots_around_location(location: tuple[float, float], radius: int =
     }
 
 
+@mcp.resource(uri="resource://places_scheduler_stats", name="Places Scheduler Stats", mime_type="application/json")
+async def get_places_scheduler_stats() -> str:
+    """Queue depth, wait times and quota usage of the Google Places request scheduler"""
+    from mapsAPIutils import places_scheduler
+
+    return json.dumps(await places_scheduler.stats())
+
+
 @mcp.tool(name="Open_URL_in_Browser")
 def open_url_in_browser(url: str) -> str:
     """
     Opens the given URL in the default web browser in the background.
     """
+    import webbrowser
+
     try:
         webbrowser.open(url, new=2)
         return f"Opened {url} in the browser."
@@ -422,5 +611,29 @@ def open_url_in_browser(url: str) -> str:
         return f"Failed to open {url}: {e}"
 
 
+async def close_resources() -> None:
+    """Closes the upstream HTTP clients and the timetable store (HTTP mode shutdown)."""
+    await aclose_all()
+    timetable_store.close()
+
+
+def create_http_app():
+    """App factory for the streamable HTTP mode, called once in every worker process."""
+    from serve_http import build_app
+
+    return build_app(mcp, on_shutdown=close_resources)
+
+
 if __name__ == "__main__":
-    mcp.run()
+    from serve_http import parse_args, serve
+
+    args = parse_args("GR Fetch MCP server", default_port=8000)
+    if args.transport == "stdio":
+        try:
+            mcp.run()
+        finally:
+            # mcp.run() returns once the client goes away; its event loop is closed by now
+            log_all_stats()
+            timetable_store.close()
+    else:
+        serve("main:create_http_app", args)
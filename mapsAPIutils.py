@@ -1,34 +1,88 @@
-import googlemaps
 import os
 from dotenv import load_dotenv
 
+from places_scheduler import INTERACTIVE, PlacesScheduler, SharedTokenBucket, TokenBucket
+from upstream import GOOGLE_PLACES
+
+# The quota settings below are read at import, so .env must be loaded first
 load_dotenv()
-gmaps = googlemaps.Client(key=os.getenv("GOOGLE_MAPS_API_KEY"))
 
-def search_places_nearby(
+# Created on first use: importing googlemaps (and requests) is a noticeable
+# share of server startup, and most sessions never search for places
+_gmaps = None
+
+
+def get_client():
+    global _gmaps
+    if _gmaps is None:
+        import googlemaps
+
+        # Over-quota retries are left to the scheduler instead of sleeping inside a worker thread
+        _gmaps = googlemaps.Client(key=os.getenv("GOOGLE_MAPS_API_KEY"), retry_over_query_limit=False)
+    return _gmaps
+
+
+def _is_over_query_limit(exc: BaseException) -> bool:
+    return getattr(exc, "status", None) == "OVER_QUERY_LIMIT"
+
+
+async def _places_nearby(**kwargs) -> dict:
+    # OVER_QUERY_LIMIT is retried by the scheduler with backoff; it must not open the breaker
+    return await GOOGLE_PLACES.run_blocking(get_client().places_nearby, answered=_is_over_query_limit, **kwargs)
+
+
+# The rate limit and daily count are shared through this file by every server
+# process on the host (one per stdio session, or every HTTP worker). Set
+# PLACES_QUOTA_DB to an empty string for a per-process limit.
+PLACES_QUOTA_DB = os.getenv(
+    "PLACES_QUOTA_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "places_quota.sqlite3"),
+)
+PLACES_QPS = float(os.getenv("PLACES_QPS", 10))
+PLACES_BURST = int(os.getenv("PLACES_BURST", 10))
+
+# Every Places Nearby call from the async tools goes through this scheduler.
+# Size PLACES_QPS / PLACES_DAILY_QUOTA to the quota of the API key.
+places_scheduler = PlacesScheduler(
+    _places_nearby,
+    _is_over_query_limit,
+    qps=PLACES_QPS,
+    burst=PLACES_BURST,
+    daily_quota=int(os.environ["PLACES_DAILY_QUOTA"]) if os.getenv("PLACES_DAILY_QUOTA") else None,
+    bucket=(SharedTokenBucket(PLACES_QUOTA_DB, PLACES_QPS, PLACES_BURST) if PLACES_QUOTA_DB
+            else TokenBucket(PLACES_QPS, PLACES_BURST)),
+)
+
+
+DEFAULT_PLACE_TYPES = [
+    'restaurant', 'bar', 'cafe',
+    'entertainment', 'shopping_mall', 'park'
+]
+
+async def search_places_nearby_async(
     location: tuple[float, float],
     radius: int = 1000,
     place_types: list[str] = None,
-    max_results: int = 10
+    max_results: int = 10,
+    priority: str = INTERACTIVE
 ) -> list[dict]:
+    """
+    Searches places around `location`. Place types are queried one at a
+    time and the search stops as soon as max_results are collected: Nearby
+    returns up to 20 places per request, so this is usually a single billed
+    call. Each request goes through the quota-aware
+    places_scheduler; the blocking googlemaps calls run in worker threads
+    behind the Google Places bulkhead. Tool calls use the default INTERACTIVE
+    priority; nothing enqueues BACKGROUND work yet.
+    """
     if place_types is None:
-        place_types = [
-            'restaurant', 'bar', 'cafe',
-            'entertainment', 'shopping_mall', 'park'
-        ]
+        place_types = DEFAULT_PLACE_TYPES
 
     results: list[dict] = []
     for place_type in place_types:
-        response = gmaps.places_nearby(
-            location=location,
-            radius=radius,
-            type=place_type
-        )
+        response = await places_scheduler.places_nearby(tuple(location), radius, place_type, priority=priority)
         for place in response.get("results", []):
             results.append(place)
             if len(results) >= max_results:
-                # as soon as we hit the cap, return
                 return results
-
-    # if fewer than max_results were found across all types
     return results
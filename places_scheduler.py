@@ -0,0 +1,401 @@
+"""
+Quota-aware scheduler for Google Places Nearby Search requests.
+
+Requests wait in one of two priority lanes (interactive tool calls before
+background prefetch) and are released by a token bucket sized to our
+per-second quota, with an optional daily cap. Identical queued requests
+(same location, radius and type) are merged into one upstream call. When
+Google still answers OVER_QUERY_LIMIT, the request goes back to the front of
+its lane and the bucket is paused before retrying.
+
+server.js starts one server process per query and the HTTP mode runs several
+workers, so the bucket and the daily count normally live in a SQLite file
+(SharedTokenBucket) that every process on the host draws from. Lanes and
+request merging are per process.
+"""
+import asyncio
+import contextvars
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, Set, Tuple
+
+from upstream import remaining
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+# How often (in dispatched requests) the scheduler logs its statistics
+STATS_LOG_EVERY = 100
+
+
+class QuotaExceeded(RuntimeError):
+    """The daily Places quota is used up, or a request kept hitting OVER_QUERY_LIMIT."""
+
+
+class TokenBucket:
+    """
+    Token bucket with a daily request counter, for a single process.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (int): Bucket capacity.
+    """
+
+    # Whether operations may block (on SQLite), so the scheduler runs them in a worker thread
+    blocking = False
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        # Wall-clock times, so SharedTokenBucket can hand them between processes
+        self.updated = time.time()
+        self.paused_until = 0.0
+        self.day = date.today().isoformat()
+        self.used = 0
+
+    def _refill(self) -> None:
+        now = time.time()
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+        today = date.today().isoformat()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+
+    def acquire(self, daily_quota: Optional[int] = None) -> float:
+        """
+        Takes a token and counts the request if one is available now.
+
+        Returns:
+            float: 0 if the token was taken, else the seconds to wait before trying again.
+
+        Raises:
+            QuotaExceeded: daily_quota requests were already made today.
+        """
+        self._refill()
+        if daily_quota is not None and self.used >= daily_quota:
+            raise QuotaExceeded("Daily Google Places quota is used up")
+        wait = max(0.0, self.paused_until - self.updated)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        if wait > 0:
+            return wait
+        self.tokens -= 1
+        self.used += 1
+        return 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Empties the bucket and holds it for `seconds` (used after OVER_QUERY_LIMIT)."""
+        self._refill()
+        self.tokens = 0.0
+        self.paused_until = max(self.paused_until, self.updated + seconds)
+
+    def used_today(self) -> int:
+        self._refill()
+        return self.used
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state is kept in a SQLite file, so every process using
+    the same file shares one rate limit, one OVER_QUERY_LIMIT pause and one
+    daily count. Each operation is a short IMMEDIATE transaction, which may
+    wait up to 5 seconds for other processes, so the scheduler runs them off
+    the event loop.
+
+    Args:
+        path (str): SQLite file, created if missing.
+        rate (float): Tokens added per second.
+        burst (int): Bucket capacity.
+        name (str): Row to use, for several buckets in one file.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, rate: float, burst: int, name: str = "places"):
+        super().__init__(rate, burst)
+        self.path = path
+        self.name = name
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL, updated REAL, paused_until REAL, day TEXT, used INTEGER)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _shared(self) -> Iterator[None]:
+        """Loads the shared state into this object, and writes it back afterwards, in one transaction."""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated, paused_until, day, used FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is not None:
+                    self.tokens, self.updated, self.paused_until, self.day, self.used = row
+                try:
+                    yield
+                finally:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)",
+                        (self.name, self.tokens, self.updated, self.paused_until, self.day, self.used),
+                    )
+                    conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def acquire(self, daily_quota: Optional[int] = None) -> float:
+        with self._shared():
+            return super().acquire(daily_quota)
+
+    def pause(self, seconds: float) -> None:
+        with self._shared():
+            super().pause(seconds)
+
+    def used_today(self) -> int:
+        with self._shared():
+            return super().used_today()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class _Job:
+    __slots__ = ("key", "kwargs", "lane", "future", "enqueued_at", "waiters", "attempts")
+
+    def __init__(self, key: Tuple, kwargs: Dict[str, Any], lane: str, future: asyncio.Future):
+        self.key = key
+        self.kwargs = kwargs
+        self.lane = lane
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.waiters = 0
+        self.attempts = 0
+
+
+class PlacesScheduler:
+    """
+    Args:
+        fetch (Callable): Coroutine function performing one Places Nearby call,
+            called with location, radius and type keyword arguments.
+        is_over_query_limit (Callable): Tells whether an exception raised by
+            `fetch` is Google's OVER_QUERY_LIMIT.
+        qps (float): Sustained requests per second.
+        burst (int): Requests that may go out back to back.
+        daily_quota (int, optional): Requests allowed per calendar day.
+        max_retries (int): OVER_QUERY_LIMIT retries per request.
+        backoff (float): Initial pause after OVER_QUERY_LIMIT, doubled per retry.
+        bucket (TokenBucket, optional): Rate limiter and daily counter to draw from,
+            e.g. a SharedTokenBucket; defaults to a per-process TokenBucket(qps, burst).
+    """
+
+    def __init__(
+            self,
+            fetch: Callable[..., Awaitable[dict]],
+            is_over_query_limit: Callable[[BaseException], bool],
+            qps: float = 10.0,
+            burst: int = 10,
+            daily_quota: Optional[int] = None,
+            max_retries: int = 3,
+            backoff: float = 1.0,
+            bucket: Optional[TokenBucket] = None
+    ):
+        self.fetch = fetch
+        self.is_over_query_limit = is_over_query_limit
+        self.bucket = bucket if bucket is not None else TokenBucket(qps, burst)
+        self.daily_quota = daily_quota
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._lanes: Dict[str, Deque[_Job]] = {lane: deque() for lane in LANES}
+        self._pending: Dict[Tuple, _Job] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.dispatched = 0
+        self.merged = 0
+        self.over_query_limit = 0
+        self.abandoned = 0
+        self.max_depth = {lane: 0 for lane in LANES}
+        self._waits: Dict[str, Deque[float]] = {lane: deque(maxlen=1000) for lane in LANES}
+
+    async def places_nearby(self, location: Tuple[float, float], radius: int, place_type: str,
+                            priority: str = INTERACTIVE) -> dict:
+        """
+        Queues one Places Nearby request and waits for its response, merging it
+        with an identical request that is already queued or in flight.
+        Waiting is bounded by the caller's deadline, if any.
+        """
+        if priority not in self._lanes:
+            raise ValueError(f"Unknown priority: '{priority}'")
+        key = (round(location[0], 5), round(location[1], 5), radius, place_type)
+        job = self._pending.get(key)
+        if job is not None:
+            self.merged += 1
+            if priority == INTERACTIVE and job.lane == BACKGROUND and job in self._lanes[BACKGROUND]:
+                self._lanes[BACKGROUND].remove(job)
+                job.lane = INTERACTIVE
+                self._lanes[INTERACTIVE].append(job)
+        else:
+            job = _Job(key, {"location": location, "radius": radius, "type": place_type}, priority,
+                       asyncio.get_running_loop().create_future())
+            self._pending[key] = job
+            self._lanes[priority].append(job)
+            self.max_depth[priority] = max(self.max_depth[priority], len(self._lanes[priority]))
+            self._ensure_worker()
+
+        job.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), remaining())
+        finally:
+            job.waiters -= 1
+
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times (seconds from enqueue to dispatch) and quota usage."""
+        lanes = {}
+        for lane in LANES:
+            waits = sorted(self._waits[lane])
+            lanes[lane] = {
+                "depth": len(self._lanes[lane]),
+                "max_depth": self.max_depth[lane],
+                "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95": waits[max(0, int(len(waits) * 0.95) - 1)] if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0,
+            }
+        return {
+            "lanes": lanes,
+            "dispatched": self.dispatched,
+            "merged": self.merged,
+            "abandoned": self.abandoned,
+            "over_query_limit": self.over_query_limit,
+            "daily_used": await self._call_bucket(self.bucket.used_today),
+            "daily_quota": self.daily_quota,
+            "qps": self.bucket.rate,
+        }
+
+    async def _call_bucket(self, method: Callable[..., Any], *args: Any) -> Any:
+        if self.bucket.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _ensure_worker(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            # A fresh context, so the worker does not inherit the deadline of whichever tool call started it
+            self._worker = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    def _next_job(self) -> Optional[_Job]:
+        for lane in LANES:
+            queue = self._lanes[lane]
+            while queue:
+                job = queue.popleft()
+                if job.waiters > 0:
+                    return job
+                # Every caller gave up (deadline) before it was sent: do not spend quota on it
+                self.abandoned += 1
+                self._pending.pop(job.key, None)
+                job.future.cancel()
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            if not any(self._lanes.values()):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            job = self._next_job()
+            if job is None:
+                continue
+            try:
+                wait = await self._call_bucket(self.bucket.acquire, self.daily_quota)
+            except Exception as e:
+                # QuotaExceeded, or the shared bucket failed (e.g. database is locked): fail this job only
+                self._finish(job, exc=e)
+                continue
+            if wait > 0:
+                # Back to the front of its lane; it is checked for abandonment again after the wait
+                self._lanes[job.lane].appendleft(job)
+                await asyncio.sleep(wait)
+                continue
+
+            self.dispatched += 1
+            if job.attempts == 0:
+                self._waits[job.lane].append(time.monotonic() - job.enqueued_at)
+            if self.dispatched % STATS_LOG_EVERY == 0:
+                await self._log_stats()
+            task = asyncio.create_task(self._dispatch(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, job: _Job) -> None:
+        job.attempts += 1
+        try:
+            response = await self.fetch(**job.kwargs)
+        except Exception as e:
+            if self.is_over_query_limit(e) and job.attempts <= self.max_retries:
+                self.over_query_limit += 1
+                delay = self.backoff * 2 ** (job.attempts - 1)
+                print(f"[places] OVER_QUERY_LIMIT, pausing {delay:.1f}s (attempt {job.attempts})", file=sys.stderr)
+                try:
+                    await self._call_bucket(self.bucket.pause, delay)
+                except Exception as pause_error:
+                    self._finish(job, exc=pause_error)
+                    return
+                self._lanes[job.lane].appendleft(job)
+                self._ensure_worker()
+            elif self.is_over_query_limit(e):
+                self.over_query_limit += 1
+                self._finish(job, exc=QuotaExceeded(f"Google Places is over quota: {e}"))
+            else:
+                self._finish(job, exc=e)
+            return
+        self._finish(job, result=response)
+
+    def _finish(self, job: _Job, result: Any = None, exc: Optional[BaseException] = None) -> None:
+        self._pending.pop(job.key, None)
+        if job.future.done():
+            return
+        if exc is not None:
+            job.future.set_exception(exc)
+            # Mark retrieved so an exception nobody waits for any more is not logged as lost
+            job.future.exception()
+        else:
+            job.future.set_result(result)
+
+    async def _log_stats(self) -> None:
+        try:
+            s = await self.stats()
+        except Exception as e:
+            print(f"[places] Could not read scheduler stats: {e!r}", file=sys.stderr)
+            return
+        lanes = ", ".join(
+            f"{lane} depth {v['depth']} (max {v['max_depth']}) wait p50 {v['wait_p50']:.2f}s p95 {v['wait_p95']:.2f}s"
+            for lane, v in s["lanes"].items()
+        )
+        quota = f"/{s['daily_quota']}" if s["daily_quota"] is not None else ""
+        print(f"[places] {s['dispatched']} dispatched, {s['merged']} merged, {s['over_query_limit']} over limit, "
+              f"{s['daily_used']}{quota} today; {lanes}", file=sys.stderr)
+
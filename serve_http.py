@@ -0,0 +1,113 @@
+"""
+Streamable HTTP serving mode for the MCP servers (main.py, aramain.py).
+
+By default both servers speak MCP over stdio, one process per client. With
+--transport streamable-http a single long-lived deployment serves many
+clients instead: uvicorn runs several worker processes (one per CPU core by
+default), each with its own event loop, upstream connection pools and caches
+shared by every session it handles. Sessions are stateless so any worker can
+answer any request behind the shared socket.
+
+On SIGTERM/SIGINT each worker stops accepting connections, lets in-flight
+requests finish for up to --drain-timeout seconds, and then runs the server's
+shutdown hook (closing HTTP clients, SQLite, MongoDB).
+
+Needs mcp>=1.8 (streamable HTTP support), pinned in pyproject.toml, and uvicorn.
+
+Usage:
+    python main.py --transport streamable-http --port 8000 --workers 4
+    python aramain.py --transport streamable-http --port 8001
+    MCP_TRANSPORT=streamable-http MCP_HTTP_PORT=8000 python main.py
+"""
+import argparse
+import logging
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_DRAIN_TIMEOUT = 30.0
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def parse_args(description: str, default_port: int = 8000) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--transport", choices=("stdio", "streamable-http"),
+                        default=os.getenv("MCP_TRANSPORT", "stdio"))
+    parser.add_argument("--host", default=os.getenv("MCP_HTTP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_HTTP_PORT", default_port)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MCP_HTTP_WORKERS", DEFAULT_WORKERS)),
+                        help="Worker processes (default: one per CPU core).")
+    parser.add_argument("--drain-timeout", type=float, default=DEFAULT_DRAIN_TIMEOUT,
+                        help="Seconds to let in-flight requests finish on shutdown.")
+    return parser.parse_args()
+
+
+def build_app(mcp, on_shutdown: Optional[Callable[[], Awaitable[None]]] = None):
+    """
+    Builds the streamable HTTP ASGI app of a FastMCP server, once per worker.
+
+    Args:
+        mcp (FastMCP): The server whose tools to serve.
+        on_shutdown (Callable): Awaited after the MCP session manager has stopped.
+
+    Returns:
+        Starlette: The app, serving MCP at /mcp.
+    """
+    mcp.settings.stateless_http = True
+    # Plain JSON responses: no tool streams progress, and no SSE stream per call to keep open
+    mcp.settings.json_response = True
+    # FastMCP only accepts localhost Host headers unless told otherwise
+    host = os.getenv("MCP_HTTP_HOST", "127.0.0.1")
+    if host not in LOOPBACK_HOSTS and getattr(mcp.settings, "transport_security", None) is not None:
+        from mcp.server.transport_security import TransportSecuritySettings
+
+        mcp.settings.transport_security = TransportSecuritySettings(enable_dns_rebinding_protection=False)
+
+    # The SDK logs every request at INFO, which adds up at many sessions per worker
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+
+    app = mcp.streamable_http_app()
+    session_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with session_lifespan(app):
+            print(f"MCP server '{mcp.name}' worker {os.getpid()} ready", file=sys.stderr)
+            yield
+        # Sessions are closed by now, nothing uses the shared clients anymore
+        if on_shutdown is not None:
+            try:
+                await on_shutdown()
+            except Exception as e:
+                print(f"Error during shutdown of worker {os.getpid()}: {e!r}", file=sys.stderr)
+        print(f"MCP server '{mcp.name}' worker {os.getpid()} stopped", file=sys.stderr)
+
+    app.router.lifespan_context = lifespan
+    return app
+
+
+def serve(app_factory: str, args: argparse.Namespace) -> None:
+    """
+    Runs the app from `app_factory` ("module:function", called in every worker) with uvicorn.
+
+    Workers import the module themselves (the server script's directory is on
+    sys.path), so its import-time setup runs once per worker.
+    """
+    import uvicorn
+
+    # Read back by build_app in the worker processes
+    os.environ["MCP_HTTP_HOST"] = args.host
+    print(f"Serving {app_factory} on http://{args.host}:{args.port}/mcp with {args.workers} worker(s)",
+          file=sys.stderr)
+    uvicorn.run(
+        app_factory,
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.drain_timeout,
+        log_level="warning",
+    )
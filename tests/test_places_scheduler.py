@@ -0,0 +1,133 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from places_scheduler import PlacesScheduler, QuotaExceeded, SharedTokenBucket, TokenBucket
+from upstream import Upstream
+
+
+class OverQueryLimit(Exception):
+    status = "OVER_QUERY_LIMIT"
+
+
+def is_over_query_limit(exc):
+    return getattr(exc, "status", None) == "OVER_QUERY_LIMIT"
+
+
+def test_over_query_limit_does_not_open_breaker():
+    provider = Upstream("test-places", max_concurrency=2)
+    calls = []
+
+    def places_nearby(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= 6:
+            raise OverQueryLimit()
+        return {"results": [{"name": "cafe"}]}
+
+    async def fetch(**kwargs):
+        return await provider.run_blocking(places_nearby, answered=is_over_query_limit, **kwargs)
+
+    async def run():
+        scheduler = PlacesScheduler(fetch, is_over_query_limit, qps=1000, burst=10,
+                                    max_retries=10, backoff=0.001)
+        return await scheduler.places_nearby((41.7, 44.8), 1000, "cafe")
+
+    assert asyncio.run(run()) == {"results": [{"name": "cafe"}]}
+    assert len(calls) == 7
+    assert provider.breaker("test-places").state == "closed"
+
+
+def test_other_errors_still_open_breaker():
+    provider = Upstream("test-places", max_concurrency=2)
+
+    def places_nearby(**kwargs):
+        raise OSError("connection reset")
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(OSError):
+                await provider.run_blocking(places_nearby, answered=is_over_query_limit)
+
+    asyncio.run(run())
+    assert provider.breaker("test-places").state == "open"
+
+
+def test_shared_bucket_limits_burst_across_instances(tmp_path):
+    path = str(tmp_path / "quota.sqlite3")
+    # Two processes' worth of buckets on one file; a rate this low adds no tokens during the test
+    first = SharedTokenBucket(path, rate=0.001, burst=3)
+    second = SharedTokenBucket(path, rate=0.001, burst=3)
+    taken = [bucket.acquire() for bucket in (first, second, first, second)]
+    assert taken[:3] == [0.0, 0.0, 0.0]
+    assert taken[3] > 0
+    assert first.used_today() == second.used_today() == 3
+    first.close()
+    second.close()
+
+
+def test_shared_pause_applies_to_every_instance(tmp_path):
+    path = str(tmp_path / "quota.sqlite3")
+    first = SharedTokenBucket(path, rate=100, burst=10)
+    second = SharedTokenBucket(path, rate=100, burst=10)
+    first.pause(5)
+    assert second.acquire() > 4
+    first.close()
+    second.close()
+
+
+def test_daily_quota():
+    bucket = TokenBucket(rate=1000, burst=10)
+    assert bucket.acquire(daily_quota=2) == 0.0
+    assert bucket.acquire(daily_quota=2) == 0.0
+    with pytest.raises(QuotaExceeded):
+        bucket.acquire(daily_quota=2)
+
+
+def test_identical_requests_are_merged():
+    calls = []
+
+    async def fetch(**kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return {"results": []}
+
+    async def run():
+        scheduler = PlacesScheduler(fetch, is_over_query_limit, qps=1000, burst=10)
+        return await asyncio.gather(*(scheduler.places_nearby((41.7, 44.8), 1000, "bar") for _ in range(3)))
+
+    assert asyncio.run(run()) == [{"results": []}] * 3
+    assert len(calls) == 1
+
+
+class FlakyBucket(TokenBucket):
+    blocking = True
+
+    def __init__(self):
+        super().__init__(rate=1000, burst=10)
+        self.failures = 1
+
+    def acquire(self, daily_quota=None):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super().acquire(daily_quota)
+
+
+def test_bucket_error_fails_only_that_request():
+    calls = []
+
+    async def fetch(**kwargs):
+        calls.append(kwargs)
+        return {"results": []}
+
+    async def run():
+        scheduler = PlacesScheduler(fetch, is_over_query_limit, bucket=FlakyBucket())
+        with pytest.raises(sqlite3.OperationalError):
+            await scheduler.places_nearby((41.7, 44.8), 1000, "bar")
+        # The same key is not stuck behind the failed job, and the worker still runs
+        again = await asyncio.wait_for(scheduler.places_nearby((41.7, 44.8), 1000, "bar"), 1)
+        return again, (await scheduler.stats())["daily_used"]
+
+    assert asyncio.run(run()) == ({"results": []}, 1)
+    assert len(calls) == 1
@@ -0,0 +1,55 @@
+"""
+Startup regression checks, see bench_startup.py. Slower than the unit tests
+(a few seconds): every measurement runs a fresh interpreter.
+
+The lazy-import check always runs. The wall-clock budgets depend on the
+machine and its load, so they only run with STARTUP_BUDGET_TESTS=1, e.g. on
+a quiet machine before a release:
+
+    STARTUP_BUDGET_TESTS=1 python -m pytest tests/test_startup.py
+"""
+import asyncio
+import os
+import statistics
+
+import pytest
+
+import bench_startup
+
+SERVERS = ["main.py", "aramain.py"]
+
+budget = pytest.mark.skipif(not os.getenv("STARTUP_BUDGET_TESTS"),
+                            reason="wall-clock budget, set STARTUP_BUDGET_TESTS=1 to run")
+
+
+@pytest.fixture(autouse=True)
+def mongo_env(monkeypatch):
+    # aramain.py exits at import without these; it only connects on first use
+    for name, value in (("MONGODB_URI", "mongodb://localhost:27017"),
+                        ("MONGODB_DATABASE", "akaife"),
+                        ("MONGODB_COLLECTION", "sightseeings")):
+        monkeypatch.setenv(name, os.getenv(name, value))
+
+
+def module_of(server: str) -> str:
+    return os.path.splitext(server)[0]
+
+
+@pytest.mark.parametrize("server", SERVERS)
+def test_lazy_modules_are_not_imported_at_startup(server):
+    _, self_us = bench_startup.measure_import(module_of(server))
+    assert bench_startup.eager_imports(server, self_us) == []
+
+
+@budget
+@pytest.mark.parametrize("server", SERVERS)
+def test_import_time_within_budget(server):
+    import_ms = statistics.median(bench_startup.measure_import(module_of(server))[0] for _ in range(3))
+    assert import_ms <= bench_startup.IMPORT_BUDGET_MS
+
+
+@budget
+@pytest.mark.parametrize("server", SERVERS)
+def test_time_to_list_tools_within_budget(server):
+    list_tools_ms = statistics.median(asyncio.run(bench_startup.measure_list_tools(server)) for _ in range(3))
+    assert list_tools_ms <= bench_startup.LIST_TOOLS_BUDGET_MS
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from timetable import Itinerary, RideCache, Segment, TimetableGraph, best_itineraries
+
+DAY = datetime(2025, 6, 1)
+
+
+def seg(ride_id, from_code, to_code, dep, arr, price=10.0):
+    return Segment(
+        ride_id=ride_id,
+        ride_number=ride_id,
+        from_code=from_code,
+        to_code=to_code,
+        from_name=from_code,
+        to_name=to_code,
+        departure=DAY.replace(hour=dep[0], minute=dep[1]),
+        arrival=DAY.replace(hour=arr[0], minute=arr[1]),
+        price=price,
+    )
+
+
+def itinerary(arrival_hour, price):
+    leg = seg(arrival_hour, "A", "B", (6, 0), (arrival_hour, 0), price)
+    return Itinerary(legs=[leg], departure=leg.departure, arrival=leg.arrival,
+                     duration_minutes=0, transfers=0, total_price=price)
+
+
+def test_direct_ride():
+    graph = TimetableGraph([seg(1, "A", "B", (8, 0), (10, 0))])
+    [only] = graph.search("A", "B", DAY)
+    assert [leg.ride_id for leg in only.legs] == [1]
+    assert only.transfers == 0
+    assert only.duration_minutes == 120
+
+
+def test_rides_before_depart_after_are_skipped():
+    graph = TimetableGraph([seg(1, "A", "B", (8, 0), (10, 0))])
+    assert graph.search("A", "B", DAY.replace(hour=9)) == []
+
+
+def test_transfer_needs_min_transfer_time():
+    graph = TimetableGraph([
+        seg(1, "A", "H", (8, 0), (9, 0)),
+        seg(2, "H", "B", (9, 10), (10, 0)),  # 10 minutes after arriving at H
+        seg(3, "H", "B", (9, 20), (10, 30)),  # 20 minutes after
+    ])
+    [only] = graph.search("A", "B", DAY, min_transfer=timedelta(minutes=15))
+    assert [leg.ride_id for leg in only.legs] == [1, 3]
+    assert only.transfers == 1
+
+    [tight] = graph.search("A", "B", DAY, min_transfer=timedelta(minutes=5))
+    assert [leg.ride_id for leg in tight.legs] == [1, 2]
+
+
+def test_staying_on_the_same_ride_is_not_a_transfer():
+    graph = TimetableGraph([
+        seg(1, "A", "H", (8, 0), (9, 0)),
+        seg(1, "H", "B", (9, 2), (10, 0)),  # same ride continues after a 2 minute stop
+    ])
+    [only] = graph.search("A", "B", DAY, min_transfer=timedelta(minutes=15))
+    assert [leg.ride_id for leg in only.legs] == [1, 1]
+    assert only.transfers == 0
+
+
+def test_max_transfers():
+    graph = TimetableGraph([
+        seg(1, "A", "H", (8, 0), (9, 0)),
+        seg(2, "H", "B", (9, 30), (10, 0)),
+    ])
+    assert graph.search("A", "B", DAY, max_transfers=0) == []
+    assert len(graph.search("A", "B", DAY, max_transfers=1)) == 1
+
+
+def test_pareto_set_keeps_fast_and_cheap_but_drops_dominated():
+    graph = TimetableGraph([
+        seg(1, "A", "B", (8, 0), (10, 0), price=50),  # fastest
+        seg(2, "A", "B", (8, 0), (12, 0), price=20),  # cheapest
+        seg(3, "A", "B", (8, 0), (13, 0), price=30),  # slower and dearer than ride 2
+    ])
+    options = graph.search("A", "B", DAY)
+    assert sorted(leg.ride_id for i in options for leg in i.legs) == [1, 2]
+
+
+def test_same_origin_and_destination_is_rejected():
+    graph = TimetableGraph([seg(1, "A", "B", (8, 0), (10, 0))])
+    with pytest.raises(ValueError):
+        graph.search("A", "A", DAY)
+
+
+def test_best_itineraries():
+    fast, cheap = itinerary(9, 50.0), itinerary(12, 20.0)
+    best = best_itineraries([cheap, fast])
+    assert best["earliest_arrival"] is fast
+    assert best["cheapest"] is cheap
+
+
+def test_best_itineraries_without_prices_or_options():
+    unpriced = itinerary(9, None)
+    assert best_itineraries([unpriced]) == {"earliest_arrival": unpriced, "cheapest": unpriced}
+    assert best_itineraries([]) == {"earliest_arrival": None, "cheapest": None}
+
+
+def test_ride_cache_remembers_snapshot_time():
+    cache = RideCache(ttl_seconds=60)
+    crawled = datetime(2025, 5, 31, 2, 0)
+    cache.put("A", "B", "2025-06-01", ["ride"], snapshot_at=crawled)
+    cache.put("B", "A", "2025-06-01", ["live ride"])
+    assert cache.snapshot_at("A", "B", "2025-06-01") == crawled
+    assert cache.snapshot_at("B", "A", "2025-06-01") is None
+    assert cache.snapshot_at("A", "C", "2025-06-01") is None
+    assert sorted(cache.rides_on("2025-06-01")) == ["live ride", "ride"]
+
+
+def test_ride_cache_drops_expired_entries_on_put(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("timetable.time.monotonic", lambda: now[0])
+    cache = RideCache(ttl_seconds=60)
+    cache.put("A", "B", "2025-06-01", ["old"])
+    now[0] += 61
+    cache.put("B", "A", "2025-06-02", ["new"])
+    assert list(cache._entries) == [("B", "A", "2025-06-02")]
+
+
+def test_ride_cache_is_bounded():
+    cache = RideCache(ttl_seconds=60, max_entries=2)
+    cache.put("A", "B", "2025-06-01", ["1"])
+    cache.put("A", "C", "2025-06-01", ["2"])
+    cache.put("A", "B", "2025-06-01", ["1 again"])
+    cache.put("A", "D", "2025-06-01", ["3"])
+    assert cache.get("A", "C", "2025-06-01") is None
+    assert cache.get("A", "B", "2025-06-01") == ["1 again"]
+    assert cache.get("A", "D", "2025-06-01") == ["3"]
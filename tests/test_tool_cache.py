@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tool_cache import AVAILABILITY_TTL, ToolCache
+
+
+def result(text, is_error=False):
+    return SimpleNamespace(content=text, isError=is_error)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("tool_cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_hit_ignores_argument_order():
+    cache = ToolCache()
+    cache.put("Plan_Journey", {"origin": "Tbilisi", "destination": "Batumi"}, result("rides"))
+    assert cache.get("Plan_Journey", {"destination": "Batumi", "origin": "Tbilisi"}).content == "rides"
+    assert cache.get("Plan_Journey", {"origin": "Tbilisi", "destination": "Poti"}) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_tool_ttl(clock):
+    cache = ToolCache()
+    cache.put("Plan_Journey", {"origin": "Tbilisi"}, result("rides"))
+    clock[0] += AVAILABILITY_TTL - 1
+    assert cache.get("Plan_Journey", {"origin": "Tbilisi"}) is not None
+    clock[0] += 1
+    assert cache.get("Plan_Journey", {"origin": "Tbilisi"}) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ToolCache(max_entries=2)
+    cache.put("Plan_Journey", {"n": 1}, result("1"))
+    cache.put("Plan_Journey", {"n": 2}, result("2"))
+    cache.get("Plan_Journey", {"n": 1})
+    cache.put("Plan_Journey", {"n": 3}, result("3"))
+    assert len(cache) == 2
+    assert cache.get("Plan_Journey", {"n": 2}) is None
+    assert cache.get("Plan_Journey", {"n": 1}).content == "1"
+    assert cache.get("Plan_Journey", {"n": 3}).content == "3"
+
+
+@pytest.mark.parametrize("tool_name", ["Current_Time", "Open_URL_in_Browser", "Refresh_Ride_Availability"])
+def test_uncacheable_tools_are_bypassed(tool_name):
+    cache = ToolCache()
+    assert not cache.cacheable(tool_name, {})
+    cache.put(tool_name, {}, result("value"))
+    assert cache.get(tool_name, {}) is None
+    assert len(cache) == 0
+
+
+def test_live_lookups_are_bypassed():
+    cache = ToolCache()
+    cache.put("Plan_Journey", {"origin": "Tbilisi"}, result("snapshot"))
+    assert not cache.cacheable("Plan_Journey", {"origin": "Tbilisi", "live": True})
+    cache.put("Plan_Journey", {"origin": "Tbilisi", "live": True}, result("live"))
+    assert cache.get("Plan_Journey", {"origin": "Tbilisi", "live": True}) is None
+    assert len(cache) == 1
+
+
+def test_errors_are_not_cached():
+    cache = ToolCache()
+    cache.put("Railway_Stations", {}, result("upstream down", is_error=True))
+    assert cache.get("Railway_Stations", {}) is None
+    assert len(cache) == 0
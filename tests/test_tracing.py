@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+import trace_summary
+from tracing import Tracer
+
+
+def test_spans_record_duration_attributes_and_errors():
+    tracer = Tracer()
+    with tracer.span("Plan_Journey", "tool", turn=1) as span:
+        span.attrs["result_bytes"] = 42
+    with pytest.raises(ValueError):
+        with tracer.span("messages.create", "llm"):
+            raise ValueError("boom")
+
+    tool, llm = tracer.spans
+    assert tool.to_dict()["turn"] == 1 and tool.to_dict()["result_bytes"] == 42
+    assert tool.duration >= 0
+    assert llm.attrs["error"] == "ValueError"
+    assert set(tracer.phase_totals()) == {"tool", "llm"}
+
+
+def test_traces_are_appended_as_json_lines(tmp_path):
+    path = str(tmp_path / "traces" / "agent-traces.jsonl")
+    for _ in range(2):
+        tracer = Tracer()
+        with tracer.span("Railway_Stations", "tool"):
+            pass
+        tracer.write(path)
+
+    traces = trace_summary.load_traces([path])
+    assert len(traces) == 2
+    assert traces[0]["spans"][0]["name"] == "Railway_Stations"
+
+
+def test_write_is_disabled_by_an_empty_trace_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("AKAIFE_TRACE_FILE", "")
+    Tracer().write()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_missing_trace_file_gives_no_traces(tmp_path, capsys):
+    assert trace_summary.load_traces([str(tmp_path / "missing.jsonl")]) == []
+    trace_summary.summarize([], top=5)
+    assert capsys.readouterr().out.strip() == "0 traces"
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    path.write_text(json.dumps({"trace_id": "a", "duration": 1.0, "spans": []}) + "\nnot json\n\n")
+    assert [t["trace_id"] for t in trace_summary.load_traces([str(path)])] == ["a"]
+
+
+def trace(trace_id, duration, tools, error=None):
+    spans = [{"name": "messages.create", "kind": "llm", "start": 0.0, "duration": 0.5}]
+    spans += [{"name": name, "kind": "tool", "start": 0.5, "duration": 0.2, "turn": turn} for turn, name in tools]
+    result = {"trace_id": trace_id, "duration": duration, "llm_turns": 2, "spans": spans}
+    if error:
+        result["error"] = error
+    return result
+
+
+def test_turn_pattern():
+    assert trace_summary.turn_pattern(trace("a", 1.0, [(1, "Railway_Stations"), (2, "Plan_Journey"),
+                                                       (2, "Plan_Journey")])) == \
+        "Railway_Stations > Plan_Journey,Plan_Journey > answer"
+    assert trace_summary.turn_pattern(trace("b", 1.0, [(1, "Plan_Journey")], error="Timeout")) == \
+        "Plan_Journey > error:Timeout"
+
+
+def test_summary_flags_the_slowest_query(capsys):
+    traces = [trace("fast", 1.0, [(1, "Railway_Stations")]), trace("slow", 9.0, [(1, "Plan_Journey")])]
+    trace_summary.summarize(traces, top=1)
+    out = capsys.readouterr().out
+    assert out.startswith("2 traces")
+    assert "slow  longest span" in out and "fast  longest span" not in out
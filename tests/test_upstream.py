@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from upstream import DeadlineExceeded, Upstream, deadline
+
+
+def slow_provider(timeout):
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={})
+
+    provider = Upstream("test", max_concurrency=2, timeout=timeout)
+    provider._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return provider
+
+
+def test_short_deadline_is_not_a_host_failure():
+    provider = slow_provider(timeout=10)
+
+    async def run():
+        with deadline(0.1):
+            await provider.request("POST", "https://example.test/search")
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert provider.breaker("example.test").failures == 0
+
+
+def test_provider_timeout_is_a_host_failure():
+    provider = slow_provider(timeout=0.1)
+
+    async def run():
+        with deadline(10):
+            await provider.request("POST", "https://example.test/search")
+
+    with pytest.raises(httpx.TimeoutException):
+        asyncio.run(run())
+    assert provider.breaker("example.test").failures == 1
+
+
+def test_blocking_call_past_deadline_is_not_a_host_failure():
+    provider = Upstream("test-sdk", max_concurrency=2, timeout=10)
+
+    async def run():
+        with deadline(0.1):
+            await provider.run_blocking(time.sleep, 0.5)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert provider.breaker("test-sdk").failures == 0
+
+
+def test_blocking_call_over_timeout_is_a_host_failure():
+    provider = Upstream("test-sdk", max_concurrency=2, timeout=0.1)
+
+    async def run():
+        await provider.run_blocking(time.sleep, 0.5)
+
+    with pytest.raises(TimeoutError) as info:
+        asyncio.run(run())
+    assert not isinstance(info.value, DeadlineExceeded)
+    assert provider.breaker("test-sdk").failures == 1
@@ -0,0 +1,235 @@
+"""
+Timetable graph built from cached ride data, with a time-dependent itinerary search.
+
+Stations are nodes and every ride returned by ticket-search becomes a timed
+segment (edge) between the queried start and end stations. The search is a
+label-setting Dijkstra over (arrival time, price) that keeps a Pareto set of
+labels per station, so one pass yields both the earliest-arrival and the
+cheapest itinerary while honouring a minimum transfer time between rides.
+"""
+import heapq
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+class Segment(BaseModel):
+    """A single timed ride between two stations."""
+    ride_id: int
+    ride_number: int
+    from_code: str
+    to_code: str
+    from_name: str
+    to_name: str
+    departure: datetime
+    arrival: datetime
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    available_seats: int = 0
+
+
+class Itinerary(BaseModel):
+    """One or more segments chained with transfers."""
+    legs: List[Segment]
+    departure: datetime
+    arrival: datetime
+    duration_minutes: int
+    transfers: int
+    total_price: Optional[float] = None
+
+
+def segment_from_ride(ride: Any) -> Segment:
+    """
+    Converts a ticket-search Ride into a Segment. The price is the cheapest seat
+    class that still has seats, falling back to the cheapest class overall.
+    """
+    classes = ride.availableSeatsClasses
+    open_classes = [c for c in classes if c.availableNumberOfSeats > 0] or classes
+    cheapest = min(open_classes, key=lambda c: c.priceOfSeats.amount, default=None)
+    return Segment(
+        ride_id=ride.id,
+        ride_number=ride.rideNumber,
+        from_code=ride.startStation.station.code,
+        to_code=ride.endStation.station.code,
+        from_name=ride.startStation.station.name,
+        to_name=ride.endStation.station.name,
+        departure=ride.startStation.departureDateTime,
+        arrival=ride.endStation.arrivalDateTime,
+        price=cheapest.priceOfSeats.amount if cheapest else None,
+        currency=cheapest.priceOfSeats.currencyCode if cheapest else None,
+        available_seats=sum(c.availableNumberOfSeats for c in classes),
+    )
+
+
+class RideCache:
+    """
+    In-memory cache of ticket-search results keyed by (start code, end code, date).
+
+    Args:
+        ttl_seconds (float): How long a fetched result stays valid.
+        max_entries (int): Entries kept at most; the oldest are dropped first.
+    """
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str, str], Tuple[float, List[Any], Optional[datetime]]] = {}
+
+    def get(self, start_code: str, end_code: str, date_str: str) -> Optional[List[Any]]:
+        entry = self._entries.get((start_code, end_code, date_str))
+        if entry is None:
+            return None
+        fetched_at, rides, _ = entry
+        if time.monotonic() - fetched_at > self.ttl_seconds:
+            del self._entries[(start_code, end_code, date_str)]
+            return None
+        return rides
+
+    def put(self, start_code: str, end_code: str, date_str: str, rides: List[Any],
+            snapshot_at: Optional[datetime] = None) -> None:
+        """snapshot_at is the crawl time when the rides come from the timetable snapshot rather than a live query."""
+        now = time.monotonic()
+        key = (start_code, end_code, date_str)
+        # Entries are kept in insertion order, so the oldest (and first to expire) come first
+        self._entries.pop(key, None)
+        while self._entries:
+            oldest = next(iter(self._entries))
+            if len(self._entries) < self.max_entries and now - self._entries[oldest][0] <= self.ttl_seconds:
+                break
+            del self._entries[oldest]
+        self._entries[key] = (now, rides, snapshot_at)
+
+    def snapshot_at(self, start_code: str, end_code: str, date_str: str) -> Optional[datetime]:
+        """Crawl time of a cached snapshot result, None for live results or when nothing is cached."""
+        if self.get(start_code, end_code, date_str) is None:
+            return None
+        return self._entries[(start_code, end_code, date_str)][2]
+
+    def rides_on(self, date_str: str) -> List[Any]:
+        """All still-valid cached rides queried for the given date."""
+        rides = []
+        for start_code, end_code, cached_date in list(self._entries):
+            if cached_date == date_str:
+                rides.extend(self.get(start_code, end_code, cached_date) or [])
+        return rides
+
+
+class _Label:
+    __slots__ = ("station", "arrival", "cost", "transfers", "ride_id", "legs")
+
+    def __init__(self, station: str, arrival: datetime, cost: float, transfers: int,
+                 ride_id: Optional[int], legs: Tuple[Segment, ...]):
+        self.station = station
+        self.arrival = arrival
+        self.cost = cost
+        self.transfers = transfers
+        self.ride_id = ride_id
+        self.legs = legs
+
+
+class TimetableGraph:
+    """
+    Stations as nodes, timed segments as edges.
+
+    Args:
+        segments (Iterable[Segment]): Segments to index. Duplicates (same ride
+            between the same stations) are collapsed.
+    """
+
+    def __init__(self, segments: Iterable[Segment]):
+        unique: Dict[Tuple[int, str, str], Segment] = {}
+        for seg in segments:
+            unique[(seg.ride_id, seg.from_code, seg.to_code)] = seg
+        self.outgoing: Dict[str, List[Segment]] = defaultdict(list)
+        for seg in unique.values():
+            if seg.arrival > seg.departure:
+                self.outgoing[seg.from_code].append(seg)
+        for segs in self.outgoing.values():
+            segs.sort(key=lambda s: s.departure)
+
+    def search(
+            self,
+            origin: str,
+            destination: str,
+            depart_after: datetime,
+            min_transfer: timedelta = timedelta(minutes=15),
+            max_transfers: int = 2
+    ) -> List[Itinerary]:
+        """
+        Returns the Pareto-optimal itineraries (arrival time vs. price) from
+        origin to destination departing no earlier than depart_after. Staying
+        on the same ride between segments is not a transfer and needs no
+        transfer time. Origin and destination must differ.
+        """
+        if origin == destination:
+            raise ValueError("Origin and destination are the same station")
+        if depart_after.tzinfo is None:
+            # Ride times from ticket-search may carry an offset; compare like with like
+            tz = next((s[0].departure.tzinfo for s in self.outgoing.values() if s), None)
+            depart_after = depart_after.replace(tzinfo=tz)
+
+        bags: Dict[str, List[_Label]] = defaultdict(list)
+        counter = 0
+        start = _Label(origin, depart_after, 0.0, 0, None, ())
+        queue = [(start.arrival, start.cost, counter, start)]
+
+        while queue:
+            _, _, _, label = heapq.heappop(queue)
+            if any(self._dominates(other, label, min_transfer) for other in bags[label.station]):
+                continue
+            bags[label.station].append(label)
+            if label.station == destination:
+                continue
+
+            visited = {leg.from_code for leg in label.legs}
+            for seg in self.outgoing.get(label.station, []):
+                if seg.to_code in visited or seg.to_code == origin:
+                    continue
+                same_ride = seg.ride_id == label.ride_id
+                ready = label.arrival if same_ride or label.ride_id is None else label.arrival + min_transfer
+                if seg.departure < ready:
+                    continue
+                transfers = label.transfers + (0 if same_ride or label.ride_id is None else 1)
+                if transfers > max_transfers:
+                    continue
+                price = seg.price if seg.price is not None else math.inf
+                nxt = _Label(seg.to_code, seg.arrival, label.cost + price, transfers,
+                             seg.ride_id, label.legs + (seg,))
+                if any(self._dominates(other, nxt, min_transfer) for other in bags[nxt.station]):
+                    continue
+                counter += 1
+                heapq.heappush(queue, (nxt.arrival, nxt.cost, counter, nxt))
+
+        return [self._to_itinerary(label) for label in bags.get(destination, [])]
+
+    @staticmethod
+    def _dominates(a: _Label, b: _Label, min_transfer: timedelta) -> bool:
+        # a must be able to catch every onward ride b could, including b's current ride
+        ready = a.arrival if a.ride_id == b.ride_id else a.arrival + min_transfer
+        return ready <= b.arrival and a.cost <= b.cost and a.transfers <= b.transfers
+
+    @staticmethod
+    def _to_itinerary(label: _Label) -> Itinerary:
+        first, last = label.legs[0], label.legs[-1]
+        return Itinerary(
+            legs=list(label.legs),
+            departure=first.departure,
+            arrival=last.arrival,
+            duration_minutes=int((last.arrival - first.departure).total_seconds() // 60),
+            transfers=label.transfers,
+            total_price=label.cost if math.isfinite(label.cost) else None,
+        )
+
+
+def best_itineraries(itineraries: List[Itinerary]) -> Dict[str, Optional[Itinerary]]:
+    """Picks the earliest-arrival and the cheapest itinerary from a Pareto set."""
+    if not itineraries:
+        return {"earliest_arrival": None, "cheapest": None}
+    earliest = min(itineraries, key=lambda i: (i.arrival, i.total_price is None, i.total_price or 0))
+    priced = [i for i in itineraries if i.total_price is not None]
+    cheapest = min(priced, key=lambda i: (i.total_price, i.arrival)) if priced else earliest
+    return {"earliest_arrival": earliest, "cheapest": cheapest}
@@ -0,0 +1,146 @@
+"""
+Local SQLite store for crawled Georgian Railway timetable snapshots.
+
+Rides are kept as zlib-compressed JSON, indexed by (start code, end code, date).
+A pair/date row is written even when ticket-search returned no rides, so the
+store can tell "no trains" apart from "not crawled". A date is only treated as
+fully covered once a crawl over all active pairs has finished for it.
+"""
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+
+DEFAULT_DB_PATH = os.getenv(
+    "TIMETABLE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "timetable.sqlite3"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pair_snapshots (
+    start_code TEXT NOT NULL,
+    end_code TEXT NOT NULL,
+    date TEXT NOT NULL,
+    ride_count INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    PRIMARY KEY (start_code, end_code, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rides (
+    start_code TEXT NOT NULL,
+    end_code TEXT NOT NULL,
+    date TEXT NOT NULL,
+    ride_id INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (start_code, end_code, date, ride_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS crawled_dates (
+    date TEXT PRIMARY KEY,
+    finished_at TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rides_by_date ON rides (date);
+"""
+
+
+class Snapshot(NamedTuple):
+    fetched_at: datetime
+    rides: List[str]
+
+
+class TimetableStore:
+    """
+    Args:
+        path (str): SQLite database file. Created on first use.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def save(self, start_code: str, end_code: str, date_str: str,
+             rides: Iterable[Tuple[int, str]]) -> None:
+        """Replaces the snapshot for a pair/date with (ride id, ride JSON) entries."""
+        rows = [(start_code, end_code, date_str, ride_id, zlib.compress(payload.encode()))
+                for ride_id, payload in rides]
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM rides WHERE start_code = ? AND end_code = ? AND date = ?",
+                (start_code, end_code, date_str),
+            )
+            self.conn.executemany("INSERT OR REPLACE INTO rides VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pair_snapshots VALUES (?, ?, ?, ?, ?)",
+                (start_code, end_code, date_str, len(rows), datetime.now().isoformat()),
+            )
+
+    def load(self, start_code: str, end_code: str, date_str: str,
+             max_age: Optional[timedelta] = None) -> Optional[Snapshot]:
+        """Returns the snapshot for a pair/date, or None if it was never crawled or is older than max_age."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT fetched_at FROM pair_snapshots WHERE start_code = ? AND end_code = ? AND date = ?",
+                (start_code, end_code, date_str),
+            ).fetchone()
+            if row is None:
+                return None
+            fetched_at = datetime.fromisoformat(row[0])
+            if max_age is not None and datetime.now() - fetched_at > max_age:
+                return None
+            payloads = self.conn.execute(
+                "SELECT payload FROM rides WHERE start_code = ? AND end_code = ? AND date = ?",
+                (start_code, end_code, date_str),
+            ).fetchall()
+        return Snapshot(fetched_at, [zlib.decompress(p).decode() for (p,) in payloads])
+
+    def rides_on(self, date_str: str) -> List[str]:
+        """All stored rides (as JSON) for every pair crawled on the given date."""
+        with self._lock:
+            payloads = self.conn.execute("SELECT payload FROM rides WHERE date = ?", (date_str,)).fetchall()
+        return [zlib.decompress(p).decode() for (p,) in payloads]
+
+    def mark_crawled(self, date_str: str) -> None:
+        """Records that a crawl over all active pairs finished for the date."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO crawled_dates VALUES (?, ?)", (date_str, datetime.now().isoformat())
+            )
+
+    def is_crawled(self, date_str: str, max_age: Optional[timedelta] = None) -> bool:
+        """True if a full crawl finished for the date (within max_age, if given)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT finished_at FROM crawled_dates WHERE date = ?", (date_str,)
+            ).fetchone()
+        if row is None:
+            return False
+        return max_age is None or datetime.now() - datetime.fromisoformat(row[0]) <= max_age
+
+    def active_pairs(self) -> Set[Tuple[str, str]]:
+        """Station pairs that had at least one ride in any stored snapshot."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT start_code, end_code FROM pair_snapshots WHERE ride_count > 0"
+            ).fetchall()
+        return {(a, b) for a, b in rows}
+
+    def prune(self, before_date: str) -> None:
+        """Drops snapshots for dates before before_date (YYYY-MM-DD)."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM rides WHERE date < ?", (before_date,))
+            self.conn.execute("DELETE FROM pair_snapshots WHERE date < ?", (before_date,))
+            self.conn.execute("DELETE FROM crawled_dates WHERE date < ?", (before_date,))
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,404 @@
+"""
+Shared async HTTP clients for the upstream providers used by the MCP tools.
+
+Every provider gets its own pooled client and its own bulkhead (a semaphore
+capping in-flight requests), so a slow provider can only queue its own calls
+and never starves the others.
+
+On top of that each request:
+    - is bounded by the deadline of the tool call it belongs to (see `deadline`
+      and `with_deadline`), not just a fixed per-request timeout;
+    - is hedged when idempotent: if no answer arrives within the provider's
+      recent p95 latency, a duplicate is sent and the first answer wins;
+    - goes through a per-host circuit breaker that fails fast while the host
+      is unhealthy.
+
+Latency samples and breaker state live in the process. Hedging starts after
+20 requests to a provider and a breaker after 5 consecutive failures, so both
+only take effect in long-lived servers (streamable HTTP mode, the crawler),
+not in the one-process-per-query stdio deployment.
+"""
+import asyncio
+import contextvars
+import functools
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.myauto.ge/",
+    "Origin": "https://www.myauto.ge",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+# How often (in requests) each provider logs its hedge rate and breaker states
+STATS_LOG_EVERY = 100
+
+
+class DeadlineExceeded(TimeoutError):
+    """The tool call's deadline passed before the upstream answered."""
+
+
+class CircuitOpenError(RuntimeError):
+    """The host's circuit breaker is open, so the request was not sent."""
+
+
+# --- Deadlines ---
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Bounds every upstream request made inside the block. Nested deadlines can only shrink."""
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline, or None if there is none."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def with_deadline(seconds: float) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Decorator form of `deadline` for async tool functions."""
+    def decorator(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with deadline(seconds):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Circuit breaker ---
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Args:
+        host (str): Host name used in log lines.
+        failure_threshold (int): Consecutive failures that open the breaker.
+        reset_timeout (float): Seconds to stay open before letting a single
+            probe request through (half-open).
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_request(self) -> None:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"{self.host} is unavailable (circuit open)")
+            self._transition("half_open")
+        if self.state == "half_open":
+            if self._probing:
+                raise CircuitOpenError(f"{self.host} is unavailable (circuit half-open, probe in flight)")
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        if self.state != "closed":
+            self._transition("closed")
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != "open":
+                self._transition("open")
+
+    def record_cancelled(self) -> None:
+        """The request was abandoned by the caller; says nothing about the host's health."""
+        self._probing = False
+
+    def _transition(self, state: str) -> None:
+        print(f"[upstream] {self.host} breaker {self.state} -> {state} "
+              f"(consecutive failures: {self.failures})", file=sys.stderr)
+        self.state = state
+
+
+class Upstream:
+    """
+    A single upstream provider.
+
+    Args:
+        name (str): Provider name used in log lines.
+        max_concurrency (int): Bulkhead size, i.e. how many requests to this
+            provider may be in flight at once.
+        timeout (float): Per-attempt timeout in seconds, further capped by the
+            current deadline.
+        headers (Dict[str, str], optional): Headers sent with every request.
+        seed_url (str, optional): Page visited once before the first request
+            so the client picks up the cookies the provider expects.
+        min_hedge_delay (float): Lower bound for the hedge delay, so a fast
+            provider is not hit with duplicates on every small hiccup.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            max_concurrency: int,
+            timeout: float = 10.0,
+            headers: Optional[Dict[str, str]] = None,
+            seed_url: Optional[str] = None,
+            min_hedge_delay: float = 0.3
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.seed_url = seed_url
+        self.min_hedge_delay = min_hedge_delay
+        self._bulkhead = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._seeded = False
+        self._seed_lock = asyncio.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                verify=False,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+        return self._client
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host)
+        return self._breakers[host]
+
+    def hedge_delay(self) -> float:
+        """Recent p95 latency of this provider, or the timeout until there are enough samples."""
+        if len(self._latencies) < 20:
+            return self.timeout
+        ordered = sorted(self._latencies)
+        return max(self.min_hedge_delay, ordered[int(len(ordered) * 0.95) - 1])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay": self.hedge_delay(),
+            "breakers": {host: b.state for host, b in self._breakers.items()},
+        }
+
+    def _attempt_timeout(self) -> float:
+        left = remaining()
+        if left is None:
+            return self.timeout
+        if left <= 0:
+            raise DeadlineExceeded(f"{self.name}: deadline exceeded")
+        return min(self.timeout, left)
+
+    async def _seed(self) -> None:
+        if self._seeded or not self.seed_url:
+            return
+        async with self._seed_lock:
+            if not self._seeded:
+                await self.client.get(self.seed_url, timeout=self._attempt_timeout())
+                self._seeded = True
+
+    async def _attempt(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        async with self._bulkhead:
+            await self._seed()
+            started = time.monotonic()
+            timeout = self._attempt_timeout()
+            try:
+                # httpx timeouts are per read/connect; this bounds the whole exchange
+                resp = await asyncio.wait_for(self.client.request(method, url, timeout=timeout, **kwargs), timeout)
+            except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+                if timeout < self.timeout:
+                    # The caller ran out of time, which says nothing about the host
+                    raise DeadlineExceeded(f"{self.name}: deadline exceeded") from None
+                if isinstance(e, httpx.TimeoutException):
+                    raise
+                raise httpx.TimeoutException(f"{self.name}: no response within {timeout:.1f}s") from None
+            if resp.status_code < 500:
+                self._latencies.append(time.monotonic() - started)
+            return resp
+
+    async def _hedged(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        primary = asyncio.ensure_future(self._attempt(method, url, **kwargs))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            delay = self.hedge_delay()
+            left = remaining()
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            # Only hedge if the duplicate has a chance to finish and will not just queue on the bulkhead
+            if done or self._bulkhead.locked() or (left is not None and left <= delay):
+                return await primary
+
+            self.hedged += 1
+            backup = asyncio.ensure_future(self._attempt(method, url, **kwargs))
+            pending.add(backup)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def request(self, method: str, url: str, hedge: Optional[bool] = None, **kwargs: Any) -> httpx.Response:
+        """
+        Sends a request through this provider's bulkhead and the host's circuit breaker.
+
+        Args:
+            hedge (bool, optional): Allow a hedged duplicate. Defaults to True
+                for GET; pass True for POSTs that are safe to repeat.
+        """
+        self._attempt_timeout()  # fail before touching the breaker if the deadline already passed
+        breaker = self.breaker(urlsplit(url).hostname or self.name)
+        breaker.before_request()
+        self.requests += 1
+        if self.requests % STATS_LOG_EVERY == 0:
+            self._log_stats()
+
+        if hedge is None:
+            hedge = method.upper() == "GET"
+        try:
+            if hedge:
+                resp = await self._hedged(method, url, **kwargs)
+            else:
+                resp = await self._attempt(method, url, **kwargs)
+        except httpx.HTTPError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Includes DeadlineExceeded: the caller gave up before the host could answer
+            breaker.record_cancelled()
+            raise
+        if resp.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return resp
+
+    async def get_json(self, url: str, **kwargs: Any) -> Any:
+        resp = await self.request("GET", url, **kwargs)
+        if resp.status_code != 200:
+            raise ValueError(f"HTTP {resp.status_code}")
+        return resp.json()
+
+    async def post_json(self, url: str, payload: Any, **kwargs: Any) -> Any:
+        resp = await self.request("POST", url, json=payload, **kwargs)
+        if resp.status_code >= 300:
+            raise ValueError(f"HTTP {resp.status_code}")
+        return resp.json()
+
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any,
+                           answered: Optional[Callable[[BaseException], bool]] = None, **kwargs: Any) -> Any:
+        """
+        Runs a blocking SDK call in a worker thread, inside this provider's
+        bulkhead and breaker. Never hedged: SDK calls may cost quota.
+
+        Args:
+            answered (Callable, optional): Tells whether an exception raised by
+                `fn` is a regular answer from a healthy provider (e.g. a quota
+                error the caller retries itself). Those do not count towards
+                opening the breaker.
+        """
+        self._attempt_timeout()
+        breaker = self.breaker(self.name)
+        breaker.before_request()
+        self.requests += 1
+        timeout = self.timeout
+        try:
+            async with self._bulkhead:
+                timeout = self._attempt_timeout()
+                result = await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), timeout)
+        except DeadlineExceeded:
+            breaker.record_cancelled()
+            raise
+        except asyncio.TimeoutError as e:
+            if timeout < self.timeout:
+                breaker.record_cancelled()
+                raise DeadlineExceeded(f"{self.name}: deadline exceeded") from e
+            breaker.record_failure()
+            raise TimeoutError(f"{self.name}: no response within {timeout:.1f}s") from e
+        except Exception as e:
+            if answered is not None and answered(e):
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.record_cancelled()
+            raise
+        breaker.record_success()
+        return result
+
+    def _log_stats(self) -> None:
+        s = self.stats()
+        breakers = ", ".join(f"{h}={state}" for h, state in s["breakers"].items()) or "none"
+        print(f"[upstream] {self.name}: {s['requests']} requests, hedge rate {s['hedge_rate']:.1%} "
+              f"({s['hedge_wins']} won), hedge delay {s['hedge_delay']:.2f}s, breakers: {breakers}",
+              file=sys.stderr)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._seeded = False
+
+
+GR = Upstream("gr.com.ge", max_concurrency=8)
+MYAUTO = Upstream("myauto.ge", max_concurrency=4, headers=BROWSER_HEADERS,
+                  seed_url="https://www.myauto.ge/ka")
+GOOGLE_PLACES = Upstream("google-places", max_concurrency=8)
+
+
+def log_all_stats() -> None:
+    """Logs request, hedge and breaker stats of every provider that was used."""
+    for upstream in (GR, MYAUTO, GOOGLE_PLACES):
+        if upstream.requests:
+            upstream._log_stats()
+
+
+async def aclose_all() -> None:
+    log_all_stats()
+    await asyncio.gather(GR.aclose(), MYAUTO.aclose(), GOOGLE_PLACES.aclose())